@@ -1,4 +1,8 @@
 import os
+import re
+import tempfile
+from datetime import datetime
+from functools import cache
 from aiogram import Router, F
 from aiogram.types import (
     Message,
@@ -12,23 +16,33 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from loguru import logger
 
+import metrics
+from fleet_import import import_fleet
+from gcal_reconcile import RECONCILE_MAX_DELETES, reconcile_calendar
 from payments import PAY_CALLBACK_PREFIX
 from utils_shared import now_local, main_menu, is_admin, normalize_date, route_url_default
+from working_calendar import parse_hours
 
 r_admin = Router(name="admin")
 
 
+@cache
 def admin_menu() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[
             [KeyboardButton(text="📋 Записи на сьогодні")],
             [KeyboardButton(text="📅 Записи на дату")],
+            [KeyboardButton(text="📥 Імпорт автопарку (CSV)")],
+            [KeyboardButton(text="🔁 Звірка з календарем")],
+            [KeyboardButton(text="🗓 Вихідні та скорочені дні")],
+            [KeyboardButton(text="📊 Метрики")],
             [KeyboardButton(text="⬅️ В головне меню")],
         ],
         resize_keyboard=True,
     )
 
 
+@cache
 def cancel_menu() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[[KeyboardButton(text="Скасувати")]],
@@ -38,7 +52,8 @@ def cancel_menu() -> ReplyKeyboardMarkup:
 
 USERS = None
 APPOINTMENTS = None
-BOOKED = None
+STORE = None
+WORK_CAL = None
 TIMEZONE = "Europe/Kyiv"
 ADMIN_IDS = set()
 gcal_enabled = False
@@ -50,16 +65,19 @@ def init_admin_context(
     *,
     users,
     appointments,
-    booked,
+    store,
+    work_calendar,
     timezone,
     admin_ids,
     gcal_ok,
     gcal_svc,
     gcal_id,
 ):
-    global USERS, APPOINTMENTS, BOOKED, TIMEZONE, ADMIN_IDS
+    global USERS, APPOINTMENTS, STORE, WORK_CAL, TIMEZONE, ADMIN_IDS
     global gcal_enabled, gcal_service, GOOGLE_CALENDAR_ID
-    USERS, APPOINTMENTS, BOOKED = users, appointments, booked
+    USERS, APPOINTMENTS = users, appointments
+    STORE = store
+    WORK_CAL = work_calendar
     TIMEZONE = timezone
     ADMIN_IDS = admin_ids
     gcal_enabled = gcal_ok
@@ -75,6 +93,14 @@ class AdminDateStates(StatesGroup):
     wait_date = State()
 
 
+class FleetImportStates(StatesGroup):
+    wait_file = State()
+
+
+class ClosureStates(StatesGroup):
+    wait_input = State()
+
+
 def _find_appt(date_key: str, time_str: str, uid: int) -> dict | None:
     items = APPOINTMENTS.get(date_key, [])
     time_str = (time_str or "").strip()
@@ -108,7 +134,7 @@ def render_schedule_plain(date_key: str) -> str:
         order_id = it.get("order_id", "—")
         amount_uah = it.get("amount_uah", "—")
         lines.append(
-            f"• {it['time']} — {fio}\n"
+            f"• {it['time']} ({it.get('duration_min', 60)} хв) — {fio}\n"
             f"  📞 +380{phone} | VIN: {vin} | №: {plate}\n"
             f"  🚗 {car}\n"
             f"  🎯 {it['reason']}\n"
@@ -153,7 +179,7 @@ async def send_schedule_with_ready_buttons(msg_or_bot, chat_id: int, date_key: s
         amount = int(it.get("amount_uah") or 0)
 
         lines.append(
-            f"• {it['time']} — {fio}\n"
+            f"• {it['time']} ({it.get('duration_min', 60)} хв) — {fio}\n"
             f"  📞 +380{phone} | VIN: {vin} | №: {plate}\n"
             f"  🚗 {car}\n"
             f"  🎯 {it['reason']}\n"
@@ -253,6 +279,201 @@ async def admin_date_entered(m: Message, state: FSMContext):
     await send_schedule_with_ready_buttons(m, m.chat.id, date_key)
 
 
+@r_admin.message(F.text == "📥 Імпорт автопарку (CSV)")
+async def admin_fleet_import(m: Message, state: FSMContext):
+    if not is_admin(m.from_user.id, ADMIN_IDS):
+        await m.answer("❌ Доступ тільки для адміністратора.")
+        return
+    await state.set_state(FleetImportStates.wait_file)
+    await m.answer(
+        "Надішліть CSV-файл з колонками: ПІБ, телефон, VIN або держномер.",
+        reply_markup=cancel_menu(),
+    )
+
+
+@r_admin.message(FleetImportStates.wait_file, F.document)
+async def admin_fleet_file(m: Message, state: FSMContext):
+    if not is_admin(m.from_user.id, ADMIN_IDS):
+        return
+    await state.clear()
+    await m.answer("⏳ Імпортую…")
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        await m.bot.download(m.document, destination=path)
+        report = await import_fleet(path, STORE)
+    except Exception as e:
+        logger.error(f"[admin] fleet import failed: {e}")
+        await m.answer("Не вдалося імпортувати файл.", reply_markup=admin_menu())
+        return
+    finally:
+        os.remove(path)
+
+    by = report["rejected_by"]
+    await m.answer(
+        "✅ Імпорт завершено.\n"
+        f"Рядків: {report['rows']}, імпортовано: {report['imported']}, "
+        f"з даними авто: {report['enriched']}\n"
+        f"Відхилено: {report['rejected']} "
+        f"(ПІБ: {by['name']}, телефон: {by['phone']}, авто: {by['vehicle']})\n"
+        f"Час: {report['seconds']} с ({report['rows_per_sec']} рядків/с)",
+        reply_markup=admin_menu(),
+    )
+
+
+@r_admin.message(F.text == "🔁 Звірка з календарем")
+async def admin_reconcile(m: Message, state: FSMContext):
+    if not is_admin(m.from_user.id, ADMIN_IDS):
+        await m.answer("❌ Доступ тільки для адміністратора.")
+        return
+    if not (gcal_enabled and gcal_service and GOOGLE_CALENDAR_ID):
+        await m.answer("Google Calendar не налаштовано.", reply_markup=admin_menu())
+        return
+    await m.answer("⏳ Звіряю записи з календарем…")
+    try:
+        rep = await reconcile_calendar(
+            STORE, USERS, gcal_service, GOOGLE_CALENDAR_ID, timezone=TIMEZONE
+        )
+    except Exception as e:
+        logger.error(f"[admin] reconcile failed: {e}")
+        await m.answer("Не вдалося виконати звірку.", reply_markup=admin_menu())
+        return
+    await m.answer(_reconcile_text(rep), reply_markup=admin_menu())
+    if rep["orphaned"]:
+        kb = InlineKeyboardBuilder()
+        kb.button(text="🗑 Підтвердити видалення", callback_data="reconcile:orphans")
+        await m.answer(
+            f"⚠️ У календарі {rep['orphaned']} подій бота без запису в базі.\n"
+            f"Якщо база не відновлювалася з копії — їх можна видалити "
+            f"(не більше {RECONCILE_MAX_DELETES} за раз).",
+            reply_markup=kb.as_markup(),
+        )
+
+
+def _reconcile_text(rep: dict) -> str:
+    return (
+        f"✅ Звірка {rep['date_from']}–{rep['date_to']} завершена.\n"
+        f"Записів: {rep['orders']}, подій у календарі: {rep['events']}\n"
+        f"Відсутніх: {rep['missing']}, створено/відновлено: {rep['created']}\n"
+        f"Виправлено час: {rep['changed']}\n"
+        f"Осиротілих подій: {rep['orphaned']}, дублікатів: {rep['duplicates']}\n"
+        f"Видалено: {rep['deleted']}, відкладено: {rep['skipped']}\n"
+        f"Оновлено Event ID: {rep['relinked']}, помилок: {rep['errors']}\n"
+        f"Час: {rep['seconds']} с"
+    )
+
+
+@r_admin.callback_query(F.data == "reconcile:orphans")
+async def on_reconcile_orphans(cq: CallbackQuery):
+    if not is_admin(cq.from_user.id, ADMIN_IDS):
+        await cq.answer("Доступ лише для адміністратора", show_alert=True)
+        return
+    if not (gcal_enabled and gcal_service and GOOGLE_CALENDAR_ID):
+        await cq.answer("Google Calendar не налаштовано.", show_alert=True)
+        return
+    await cq.message.edit_reply_markup(reply_markup=None)
+    await cq.answer("Видаляю…")
+    try:
+        rep = await reconcile_calendar(
+            STORE,
+            USERS,
+            gcal_service,
+            GOOGLE_CALENDAR_ID,
+            timezone=TIMEZONE,
+            delete_orphans=True,
+        )
+    except Exception as e:
+        logger.error(f"[admin] reconcile (orphans) failed: {e}")
+        await cq.message.answer("Не вдалося виконати звірку.", reply_markup=admin_menu())
+        return
+    logger.info(f"[admin] {cq.from_user.id} confirmed orphan delete: {rep['deleted']}")
+    await cq.message.answer(_reconcile_text(rep), reply_markup=admin_menu())
+
+
+def _closures_text() -> str:
+    today = now_local(TIMEZONE).date()
+    lines = []
+    for d, hours in sorted(WORK_CAL.closures.items()):
+        if d < today:
+            continue
+        what = "вихідний" if hours is None else f"{hours[0]:02d}:00–{hours[1]:02d}:00"
+        lines.append(f"• {d.strftime('%d.%m.%Y')} — {what}")
+    return "\n".join(lines) if lines else "Винятків немає."
+
+
+@r_admin.message(F.text == "🗓 Вихідні та скорочені дні")
+async def admin_closures(m: Message, state: FSMContext):
+    if not is_admin(m.from_user.id, ADMIN_IDS):
+        await m.answer("❌ Доступ тільки для адміністратора.")
+        return
+    await state.set_state(ClosureStates.wait_input)
+    await m.answer(
+        f"Винятки з графіка:\n{_closures_text()}\n\n"
+        "Надішліть:\n"
+        "`15.02` — вихідний\n"
+        "`15.02 10-15` — скорочений день (години роботи)\n"
+        "`-15.02` — повернути звичайний графік",
+        parse_mode="Markdown",
+        reply_markup=cancel_menu(),
+    )
+
+
+@r_admin.message(ClosureStates.wait_input, F.text)
+async def admin_closure_entered(m: Message, state: FSMContext):
+    if not is_admin(m.from_user.id, ADMIN_IDS):
+        return
+    txt = (m.text or "").strip()
+    if txt == "Скасувати":
+        await state.clear()
+        await admin_entry(m, state)
+        return
+    mt = re.fullmatch(r"(-?)\s*(\S+)(?:\s+(\d{1,2}\s*-\s*\d{1,2}))?", txt)
+    date_key = normalize_date(mt.group(2), TIMEZONE) if mt else None
+    try:
+        hours = parse_hours(mt.group(3)) if mt and mt.group(3) else None
+    except ValueError:
+        date_key = None
+    if not date_key or (mt.group(1) and hours):
+        await m.answer(
+            "Не зрозумів. Приклад: `15.02`, `15.02 10-15` або `-15.02`",
+            parse_mode="Markdown",
+        )
+        return
+
+    if hours and not WORK_CAL.open_hour <= hours[0] < hours[1] <= WORK_CAL.close_hour:
+        await m.answer(
+            f"Години мають бути в межах робочого дня "
+            f"{WORK_CAL.open_hour:02d}:00–{WORK_CAL.close_hour:02d}:00 — "
+            "подовжити день тут не можна, лише скоротити."
+        )
+        return
+
+    d = datetime.strptime(date_key, "%d.%m.%Y").date()
+    await state.clear()
+    if mt.group(1):
+        if WORK_CAL.clear_closure(d):
+            note = f"✅ {date_key}: звичайний графік."
+        else:
+            note = f"На {date_key} винятків не було."
+    else:
+        WORK_CAL.set_closure(d, hours)
+        note = f"✅ {date_key}: " + (
+            "вихідний." if hours is None else f"працюємо {hours[0]:02d}:00–{hours[1]:02d}:00."
+        )
+        booked = len(APPOINTMENTS.get(date_key, []))
+        if booked:
+            note += f"\n⚠️ На цю дату вже є записів: {booked} — їх не скасовано."
+    await m.answer(f"{note}\n\n{_closures_text()}", reply_markup=admin_menu())
+
+
+@r_admin.message(F.text == "📊 Метрики")
+async def admin_metrics(m: Message, state: FSMContext):
+    if not is_admin(m.from_user.id, ADMIN_IDS):
+        await m.answer("❌ Доступ тільки для адміністратора.")
+        return
+    await m.answer(metrics.render_plain(), reply_markup=admin_menu())
+
+
 @r_admin.callback_query(F.data.startswith("ready:"))
 async def on_ready_click(cq: CallbackQuery, state: FSMContext):
     if not is_admin(cq.from_user.id, ADMIN_IDS):
@@ -321,6 +542,7 @@ async def on_ready_amount(m: Message, state: FSMContext):
             f"{uid}"
         )
     order_id = appt["order_id"]
+    STORE.save_appointment(date_key, appt)
 
     route = route_url_default() or os.getenv("ROUTE_URL", "")
     kb = InlineKeyboardBuilder()
@@ -0,0 +1,134 @@
+# availability.py
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Callable
+
+import metrics
+
+CLOSED = -1
+
+
+class AvailabilityIndex:
+    """
+    Кількість вільних годин початку на кожен день місяця за один прохід
+    по SlotIndex (бронювання, holds, сторонні події) і вихідних.
+    Рахується для найкоротшої послуги (minutes): 0 означає, що не влазить нічого.
+    Місяць кешується; invalidate(date_key) позначає лише цей день, і при
+    наступному зверненні перераховується тільки він, а не весь місяць.
+    """
+
+    def __init__(
+        self,
+        slots,
+        *,
+        is_closed: Callable[[date], bool],
+        minutes: int,
+    ):
+        self.slots = slots
+        self.is_closed = is_closed
+        self.minutes = minutes
+        self._months: dict[tuple[int, int], list[int]] = {}
+        self._dirty: dict[tuple[int, int], set[int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.day_updates = 0
+        metrics.register("availability", self.stats)
+
+    def invalidate(self, date_key: str | None = None) -> None:
+        if date_key is None:
+            self._months.clear()
+            self._dirty.clear()
+            return
+        d, m, y = date_key.split(".")
+        ym = (int(y), int(m))
+        if ym in self._months:
+            self._dirty.setdefault(ym, set()).add(int(d))
+
+    def _count(self, d: date) -> int:
+        if self.is_closed(d):
+            return CLOSED
+        return len(self.slots.free_starts(d.strftime("%d.%m.%Y"), minutes=self.minutes))
+
+    def _compute(self, year: int, month: int) -> list[int]:
+        return [
+            self._count(date(year, month, day))
+            for day in range(1, calendar.monthrange(year, month)[1] + 1)
+        ]
+
+    def month(self, year: int, month: int) -> list[int]:
+        """Вільні години по днях (індекс = день − 1); CLOSED — вихідний."""
+        counts = self._months.get((year, month))
+        if counts is None:
+            self.misses += 1
+            counts = self._compute(year, month)
+            self._months[(year, month)] = counts
+            self._dirty.pop((year, month), None)
+            return counts
+        self.hits += 1
+        for day in self._dirty.pop((year, month), ()):
+            counts[day - 1] = self._count(date(year, month, day))
+            self.day_updates += 1
+        return counts
+
+    def month_view(self, year: int, month: int, now: datetime) -> list[int]:
+        """Те саме, але минулі дні закриті, а сьогодні — лише години після now."""
+        counts = list(self.month(year, month))
+        if (year, month) < (now.year, now.month):
+            return [CLOSED] * len(counts)
+        if (year, month) == (now.year, now.month):
+            for i in range(now.day - 1):
+                counts[i] = CLOSED
+            today = now.day - 1
+            if counts[today] > 0:
+                counts[today] = len(
+                    self.slots.free_starts(
+                        now.strftime("%d.%m.%Y"),
+                        minutes=self.minutes,
+                        after_hour=now.hour,
+                    )
+                )
+        return counts
+
+    def next_free(
+        self,
+        now: datetime,
+        k: int = 5,
+        *,
+        minutes: int | None = None,
+        user_id: int | None = None,
+        horizon_days: int = 92,
+    ) -> list[tuple[str, str]]:
+        """
+        Перші k вільних (date_key, "HH:00") після now. Вихідні й повністю
+        зайняті дні відсікаються за місячним кешем, години перевіряються
+        лише в днях, де щось вільне.
+        """
+        out: list[tuple[str, str]] = []
+        today = now.date()
+        d, end = today, today + timedelta(days=horizon_days)
+        ym, counts = None, None
+        while d < end:
+            if (d.year, d.month) != ym:
+                ym = (d.year, d.month)
+                counts = self.month(*ym)
+            if counts[d.day - 1] > 0:
+                key = d.strftime("%d.%m.%Y")
+                for t in self.slots.free_starts(
+                    key,
+                    minutes=minutes or self.minutes,
+                    user_id=user_id,
+                    after_hour=now.hour if d == today else None,
+                ):
+                    out.append((key, t))
+                    if len(out) == k:
+                        return out
+            d += timedelta(days=1)
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "months_cached": len(self._months),
+            "hits": self.hits,
+            "misses": self.misses,
+            "day_updates": self.day_updates,
+        }
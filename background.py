@@ -0,0 +1,78 @@
+# background.py
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+import metrics
+
+
+class WorkerPool:
+    """
+    Фіксований пул asyncio-воркерів над обмеженою чергою.
+    Якщо черга повна, submit() повертає False — виклик обробляється синхронно.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[None]],
+        *,
+        workers: int = 4,
+        maxsize: int = 1000,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._tasks: list[asyncio.Task] = []
+        self.done = 0
+        self.failed = 0
+        metrics.register(f"pool:{name}", self.stats)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"[{self.name}] {self.workers} worker(s) started")
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job: Any) -> bool:
+        if not self._tasks:
+            return False
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.warning(f"[{self.name}] queue full, job rejected")
+            return False
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self.handler(job)
+                self.done += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"[{self.name}] job failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "workers": len(self._tasks),
+            "done": self.done,
+            "failed": self.failed,
+        }
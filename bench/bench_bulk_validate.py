@@ -0,0 +1,69 @@
+# bench/bench_bulk_validate.py
+"""
+Пакетна валідація (bulk_validate, NumPy) проти поштучних
+validate_vin / plate_format_ok у циклі. Результати звіряються.
+
+    python bench/bench_bulk_validate.py [N]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_vin_decode import make_vin  # noqa: E402
+from bulk_validate import validate_plates, validate_vins  # noqa: E402
+from plate_api import plate_format_ok  # noqa: E402
+from vin_api import validate_vin  # noqa: E402
+from vin_decoder import WMI  # noqa: E402
+
+_PLATE_LETTERS = "ABCEHIKMOPTXАВСЕНІКМОРТХ"
+
+
+def corpus(n: int) -> tuple[list[str], list[str]]:
+    rng = random.Random(7)
+    wmis = list(WMI)
+    vins, plates = [], []
+    for i in range(n):
+        v = make_vin(rng, wmis)
+        if i % 4 == 0:
+            v = v[:8] + ("1" if v[8] != "1" else "2") + v[9:]
+        vins.append(v.lower() if i % 5 == 0 else v)
+        p = (
+            "".join(rng.choice(_PLATE_LETTERS) for _ in range(2))
+            + f"{rng.randrange(10000):04d}"
+            + "".join(rng.choice(_PLATE_LETTERS) for _ in range(2))
+        )
+        plates.append(p if i % 3 else f"{p[:2]} {p[2:6]}-{p[6:]}" if i % 2 else p[:7])
+    return vins, plates
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    vins, plates = corpus(n)
+
+    loop_v, t_loop_v = timed(lambda: [validate_vin(v) for v in vins])
+    (mask_v, _), t_np_v = timed(lambda: validate_vins(vins))
+    assert mask_v.tolist() == loop_v
+
+    loop_p, t_loop_p = timed(lambda: [plate_format_ok(p) for p in plates])
+    (mask_p, _), t_np_p = timed(lambda: validate_plates(plates))
+    assert mask_p.tolist() == loop_p
+
+    print(f"{'':<8}{'цикл, с':>10}{'NumPy, с':>10}{'прискорення':>14}{'валідних':>10}")
+    for name, a, b, ok in (
+        ("VIN", t_loop_v, t_np_v, sum(loop_v)),
+        ("номери", t_loop_p, t_np_p, sum(loop_p)),
+    ):
+        print(f"{name:<8}{a:>10.3f}{b:>10.3f}{a / b:>13.1f}x{ok:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench/bench_http_session.py
+"""
+Латентність запитів до локального stub-сервера: нова aiohttp.ClientSession
+на кожен запит (як було) проти спільної сесії з пулом (http_client).
+Міряє p50/p99 послідовних і конкурентних запитів.
+
+    python bench/bench_http_session.py [N]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import close_http_client, http_session, start_http_client  # noqa: E402
+
+
+async def _handler(request):
+    await asyncio.sleep(0.002)
+    return web.json_response({"vendor": "TOYOTA", "model": "CAMRY"})
+
+
+async def _new_session(url: str) -> float:
+    t0 = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            await resp.json()
+    return time.perf_counter() - t0
+
+
+async def _shared(url: str) -> float:
+    t0 = time.perf_counter()
+    async with http_session() as session:
+        async with session.get(url) as resp:
+            await resp.json()
+    return time.perf_counter() - t0
+
+
+def _pct(samples: list[float], p: float) -> float:
+    return statistics.quantiles(samples, n=100)[p - 1] * 1000
+
+
+async def _run(label: str, fn, url: str, n: int, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            return await fn(url)
+
+    t0 = time.perf_counter()
+    samples = await asyncio.gather(*[one() for _ in range(n)])
+    total = time.perf_counter() - t0
+    print(
+        f"{label:<28}{concurrency:>10}{_pct(samples, 50):>10.2f}"
+        f"{_pct(samples, 99):>10.2f}{n / total:>10.0f}"
+    )
+
+
+async def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app = web.Application()
+    app.router.add_get("/nomer/{plate}", _handler)
+    async with TestServer(app) as server:
+        url = f"http://{server.host}:{server.port}/nomer/AA1234BB"
+        print(f"{'варіант':<28}{'паралель':>10}{'p50, мс':>10}{'p99, мс':>10}{'зап/с':>10}")
+        for concurrency in (1, 20):
+            await _run("нова сесія на запит", _new_session, url, n, concurrency)
+            await start_http_client()
+            await _run("спільна сесія (пул)", _shared, url, n, concurrency)
+            await close_http_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+# bench/bench_order_lookup.py
+"""
+Пошук замовлення за order_id: індекс Store.orders (dict) проти
+старого перебору всіх записів у simulate_payment — на 1k, 100k і 1M записів.
+
+    python bench/bench_order_lookup.py
+"""
+import random
+import time
+
+
+def build(n: int) -> tuple[dict[str, list[dict]], dict[str, dict]]:
+    appointments: dict[str, list[dict]] = {}
+    orders: dict[str, dict] = {}
+    for i in range(n):
+        date_key = f"{i % 28 + 1:02d}.{i // 28 % 12 + 1:02d}.{2000 + i // 336}"
+        rec = {"time": f"{9 + i % 11:02d}:00", "user_id": i, "order_id": f"ord-{i}"}
+        appointments.setdefault(date_key, []).append(rec)
+        orders[rec["order_id"]] = rec
+    return appointments, orders
+
+
+def scan(appointments: dict[str, list[dict]], order_id: str) -> dict | None:
+    for items in appointments.values():
+        for rec in items:
+            if rec.get("order_id") == order_id:
+                return rec
+    return None
+
+
+def per_call_us(fn, keys: list[str]) -> float:
+    t0 = time.perf_counter()
+    for k in keys:
+        fn(k)
+    return (time.perf_counter() - t0) / len(keys) * 1e6
+
+
+def main() -> None:
+    print(f"{'записів':>10}{'індекс, мкс':>14}{'перебір, мкс':>16}")
+    for n in (1_000, 100_000, 1_000_000):
+        appointments, orders = build(n)
+        keys = [f"ord-{random.randrange(n)}" for _ in range(10_000)]
+        indexed = per_call_us(orders.get, keys)
+        scanned = per_call_us(lambda k: scan(appointments, k), keys[: max(5, 20_000 // (n // 100))])
+        print(f"{n:>10}{indexed:>14.3f}{scanned:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bench/bench_store.py
+"""
+Бронювань за секунду: Store (SQLite WAL, write-behind) проти
+початкових dict у пам'яті, JSON-файлу, що перезаписується на кожне
+бронювання, і SQLite з окремим commit на кожне бронювання.
+
+    python bench/bench_store.py [N]
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import Store  # noqa: E402
+
+
+def _rec(i: int) -> tuple[str, dict]:
+    date_key = f"{i % 28 + 1:02d}.{i // 28 % 12 + 1:02d}.2030"
+    return date_key, {
+        "time": f"{9 + i % 11:02d}:00",
+        "user_id": i,
+        "reason": "діагностика",
+        "duration_min": 60,
+        "order_id": f"bench-{i}",
+        "amount_uah": 0,
+    }
+
+
+def bench_dicts(n: int) -> float:
+    appointments: dict[str, list[dict]] = {}
+    t0 = time.perf_counter()
+    for i in range(n):
+        date_key, rec = _rec(i)
+        appointments.setdefault(date_key, []).append(rec)
+    return time.perf_counter() - t0
+
+
+def bench_json_file(n: int, d: str) -> float:
+    path = os.path.join(d, "appointments.json")
+    appointments: dict[str, list[dict]] = {}
+    t0 = time.perf_counter()
+    for i in range(n):
+        date_key, rec = _rec(i)
+        appointments.setdefault(date_key, []).append(rec)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(appointments, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    return time.perf_counter() - t0
+
+
+def bench_sqlite_per_commit(n: int, d: str) -> float:
+    conn = sqlite3.connect(os.path.join(d, "naive.db"), isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute(
+        "CREATE TABLE appointments (order_id TEXT PRIMARY KEY, date_key TEXT, time TEXT, data TEXT)"
+    )
+    t0 = time.perf_counter()
+    for i in range(n):
+        date_key, rec = _rec(i)
+        conn.execute(
+            "INSERT INTO appointments VALUES (?, ?, ?, ?)",
+            (rec["order_id"], date_key, rec["time"], json.dumps(rec, ensure_ascii=False)),
+        )
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return elapsed
+
+
+async def bench_store(n: int, d: str) -> float:
+    store = Store(os.path.join(d, "bot.db"))
+    await store.start()
+    t0 = time.perf_counter()
+    for i in range(n):
+        date_key, rec = _rec(i)
+        store.add_appointment(date_key, rec)
+        if i % 50 == 0:
+            await asyncio.sleep(0)
+    await store.flush()
+    elapsed = time.perf_counter() - t0
+    await store.close()
+    return elapsed
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as d:
+        rows = [
+            ("dict у пам'яті (без збереження)", bench_dicts(n)),
+            ("JSON-файл, перезапис на кожне", bench_json_file(min(n, 500), d), min(n, 500)),
+            ("SQLite, commit на кожне", bench_sqlite_per_commit(n, d)),
+            ("Store (WAL, write-behind)", asyncio.run(bench_store(n, d))),
+        ]
+    print(f"{'варіант':<36}{'бронювань':>10}{'с':>10}{'брон/с':>12}")
+    for name, elapsed, *count in rows:
+        k = count[0] if count else n
+        print(f"{name:<36}{k:>10}{elapsed:>10.3f}{k / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench/bench_vin_decode.py
+"""
+Локальне декодування VIN (vin_decoder.decode_vin) на корпусі з 1M
+синтетичних валідних VIN, а також швидкий шлях
+fetch_vehicle_by_vin(need_model=False) — без жодного HTTP.
+
+    python bench/bench_vin_decode.py [N]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vin_api import _TRANSLIT, _WEIGHTS, fetch_vehicle_by_vin, validate_vin  # noqa: E402
+from vin_decoder import WMI, _YEAR_CODES, decode_vin  # noqa: E402
+
+_CHARS = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+
+
+def make_vin(rng: random.Random, wmis: list[str]) -> str:
+    body = list(
+        rng.choice(wmis)
+        + "".join(rng.choice(_CHARS) for _ in range(5))
+        + "0"
+        + rng.choice(_YEAR_CODES)
+        + "".join(rng.choice(_CHARS) for _ in range(7))
+    )
+    r = sum(_TRANSLIT[ch] * _WEIGHTS[i] for i, ch in enumerate(body)) % 11
+    body[8] = "X" if r == 10 else str(r)
+    return "".join(body)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(42)
+    wmis = list(WMI) + ["ZZZ"] * (len(WMI) // 10)
+    t0 = time.perf_counter()
+    corpus = [make_vin(rng, wmis) for _ in range(n)]
+    print(f"корпус: {n} VIN за {time.perf_counter() - t0:.1f} с")
+    assert all(validate_vin(v) for v in corpus[:1000])
+
+    t0 = time.perf_counter()
+    decoded = sum(1 for v in corpus if decode_vin(v).get("make"))
+    elapsed = time.perf_counter() - t0
+    print(
+        f"decode_vin: {elapsed:.2f} с, {n / elapsed:,.0f} VIN/с, "
+        f"{elapsed / n * 1e6:.2f} мкс/VIN, марку знайдено для {decoded / n:.0%}"
+    )
+
+    sample = corpus[: min(n, 100_000)]
+
+    async def fast_path():
+        for v in sample:
+            await fetch_vehicle_by_vin(v, need_model=False)
+
+    t0 = time.perf_counter()
+    asyncio.run(fast_path())
+    elapsed = time.perf_counter() - t0
+    print(
+        f"fetch_vehicle_by_vin(need_model=False): {len(sample) / elapsed:,.0f} VIN/с, "
+        f"{elapsed / len(sample) * 1e6:.2f} мкс/VIN"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bulk_validate.py
+from typing import Sequence
+
+import numpy as np
+
+from vin_api import _TRANSLIT, _WEIGHTS
+
+_VIN_LEN = 17
+_VIN_LUT = np.full(256, -1, dtype=np.int16)
+for _ch, _v in _TRANSLIT.items():
+    _VIN_LUT[ord(_ch)] = _v
+_VIN_WEIGHTS = np.array(_WEIGHTS, dtype=np.int32)
+
+_PLATE_LEN = 8
+_CP_MAX = 0x430
+_PLATE_LETTER = np.zeros(_CP_MAX + 1, dtype=bool)
+_PLATE_LETTER[ord("A") : ord("Z") + 1] = True
+_PLATE_LETTER[ord("А") : ord("Я") + 1] = True
+for _ch in "ІЇЄ":
+    _PLATE_LETTER[ord(_ch)] = True
+_PLATE_DIGIT = np.zeros(_CP_MAX + 1, dtype=bool)
+_PLATE_DIGIT[ord("0") : ord("9") + 1] = True
+_PLATE_LETTER_COLS = [0, 1, 6, 7]
+_PLATE_DIGIT_COLS = [2, 3, 4, 5]
+_DASHES = str.maketrans("", "", "-–—")
+
+
+def _squash_upper(s: str) -> str:
+    return "".join((s or "").split()).upper()
+
+
+def validate_vins(vins: Sequence[str]) -> tuple[np.ndarray, list[str]]:
+    """
+    Пакетна перевірка формату й контрольної суми VIN (те саме, що validate_vin).
+    Повертає (булева маска, нормалізовані VIN).
+    """
+    norm = [_squash_upper(v) for v in vins]
+    n = len(norm)
+    if n == 0:
+        return np.zeros(0, dtype=bool), norm
+
+    shape_ok = np.fromiter(
+        (len(v) == _VIN_LEN and v.isascii() for v in norm), dtype=bool, count=n
+    )
+    filler = "\0" * _VIN_LEN
+    raw = "".join(v if ok else filler for v, ok in zip(norm, shape_ok)).encode("ascii")
+    mat = np.frombuffer(raw, dtype=np.uint8).reshape(n, _VIN_LEN)
+
+    vals = _VIN_LUT[mat]
+    chars_ok = (vals >= 0).all(axis=1)
+    rem = (vals.astype(np.int32) @ _VIN_WEIGHTS) % 11
+    expected = np.where(rem == 10, ord("X"), rem + ord("0"))
+    mask = shape_ok & chars_ok & (mat[:, 8] == expected)
+    return mask, norm
+
+
+def validate_plates(plates: Sequence[str]) -> tuple[np.ndarray, list[str]]:
+    """
+    Пакетна перевірка формату держномера (те саме, що plate_format_ok).
+    Повертає (булева маска, нормалізовані номери).
+    """
+    norm = [_squash_upper(p).translate(_DASHES) for p in plates]
+    n = len(norm)
+    if n == 0:
+        return np.zeros(0, dtype=bool), norm
+
+    len_ok = np.fromiter((len(p) == _PLATE_LEN for p in norm), dtype=bool, count=n)
+    arr = np.array(
+        [p if ok else "" for p, ok in zip(norm, len_ok)], dtype=f"<U{_PLATE_LEN}"
+    )
+    cps = arr.view(np.uint32).reshape(n, _PLATE_LEN)
+    cps = np.minimum(cps, _CP_MAX)
+
+    letters_ok = _PLATE_LETTER[cps[:, _PLATE_LETTER_COLS]].all(axis=1)
+    digits_ok = _PLATE_DIGIT[cps[:, _PLATE_DIGIT_COLS]].all(axis=1)
+    mask = len_ok & letters_ok & digits_ok
+    return mask, norm
@@ -0,0 +1,216 @@
+# calendar_backends.py
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from loguru import logger
+
+
+class CalendarBackend:
+    """
+    Куди черга outbox записує бронювання.
+    write_events(jobs) повертає order_id → ідентифікатор події або виняток.
+    """
+
+    name = "base"
+
+    def open(self) -> None:
+        pass
+
+    @property
+    def ready(self) -> bool:
+        return True
+
+    def write_events(self, jobs: list[dict]) -> dict[str, object]:
+        raise NotImplementedError
+
+
+class GoogleCalendarBackend(CalendarBackend):
+    """Google Calendar через BatchHttpRequest. service призначається після init."""
+
+    name = "google"
+
+    def __init__(self, calendar_id: str):
+        self.calendar_id = calendar_id
+        self.service = None
+
+    @property
+    def ready(self) -> bool:
+        return self.service is not None and bool(self.calendar_id)
+
+    def write_events(self, jobs: list[dict]) -> dict[str, object]:
+        from google_calendar import batch_insert_events, job_event_body
+
+        bodies = {job["order_id"]: job_event_body(job) for job in jobs}
+        return batch_insert_events(self.service, self.calendar_id, bodies)
+
+
+class MemoryCalendarBackend(CalendarBackend):
+    """Фейковий календар у пам'яті — для прогонів без мережі."""
+
+    name = "memory"
+
+    def __init__(self, *, latency_sec: float = 0.0):
+        self.latency_sec = latency_sec
+        self.events: dict[str, dict] = {}
+        self._ids = itertools.count(1)
+
+    def write_events(self, jobs: list[dict]) -> dict[str, object]:
+        if self.latency_sec:
+            time.sleep(self.latency_sec)
+        out: dict[str, object] = {}
+        for job in jobs:
+            event_id = f"mem-{next(self._ids)}"
+            self.events[event_id] = dict(job)
+            out[job["order_id"]] = event_id
+        return out
+
+
+def _ics_text(s: str) -> str:
+    return (
+        (s or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _ics_fold(line: str) -> str:
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts, cur = [], b""
+    for ch in line:
+        b = ch.encode("utf-8")
+        if len(cur) + len(b) > (75 if not parts else 74):
+            parts.append(cur.decode("utf-8"))
+            cur = b""
+        cur += b
+    parts.append(cur.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_utc(iso: str) -> str:
+    return datetime.fromisoformat(iso).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+class IcsFeedBackend(CalendarBackend):
+    """
+    iCalendar-фід (.ics) на диску, на який персонал може підписатися.
+    Події згруповані по днях у хронологічному порядку; при записі
+    перемальовується лише блок зміненого дня, а файл збирається з готових
+    блоків у тимчасовий і атомарно підміняє старий (os.replace).
+    """
+
+    name = "ics"
+
+    _HEADER = (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        "PRODID:-//sto-bot//bookings//UK\r\n"
+        "CALSCALE:GREGORIAN\r\n"
+        "METHOD:PUBLISH\r\n"
+    )
+    _FOOTER = "END:VCALENDAR\r\n"
+
+    def __init__(self, path: str, *, calendar_name: str = "СТО"):
+        self.path = path
+        self.calendar_name = calendar_name
+        self._header = (
+            self._HEADER + _ics_fold(f"X-WR-CALNAME:{_ics_text(calendar_name)}")
+        ).encode("utf-8")
+        self._days: dict[str, dict[str, str]] = {}
+        self._blocks: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.rewrites = 0
+
+    def open(self) -> None:
+        d = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(d, exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8", newline="") as f:
+                self._parse(f.read())
+        self._blocks = {day: self._render_day(day) for day in self._days}
+        self._write_file()
+        logger.info(
+            f"[ics] {os.path.abspath(self.path)}: "
+            f"{sum(len(v) for v in self._days.values())} event(s)"
+        )
+
+    def _parse(self, text: str) -> None:
+        for chunk in text.split("BEGIN:VEVENT\r\n")[1:]:
+            end = chunk.find("END:VEVENT\r\n")
+            if end < 0:
+                continue
+            body = "BEGIN:VEVENT\r\n" + chunk[: end + len("END:VEVENT\r\n")]
+            uid = day = None
+            for line in body.split("\r\n"):
+                if line.startswith("UID:"):
+                    uid = line[4:]
+                elif line.startswith("X-STO-DAY:"):
+                    day = line[10:]
+            if uid and day:
+                self._days.setdefault(day, {})[uid] = body
+
+    def _render_day(self, day: str) -> bytes:
+        events = self._days.get(day) or {}
+        return "".join(events[uid] for uid in sorted(events)).encode("utf-8")
+
+    def _vevent(self, job: dict, uid: str, day: str) -> str:
+        summary = f"СТО: {job.get('customer_name') or 'Клієнт'} — {job.get('reason') or 'візит'}"
+        desc = "\n".join(
+            [
+                f"Замовлення: #{job['order_id']}",
+                f"Клієнт: {job.get('customer_name') or '—'}",
+                f"Телефон: +380{job['phone']}" if job.get("phone") else "Телефон: —",
+                f"VIN: {job.get('vin') or '—'}",
+                f"Авто: {job.get('car_line') or '—'}",
+                f"Причина: {job.get('reason') or '—'}",
+            ]
+        )
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTAMP:{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}",
+            f"DTSTART:{_ics_utc(job['start'])}",
+            f"DTEND:{_ics_utc(job['end'])}",
+            f"SUMMARY:{_ics_text(summary)}",
+            f"DESCRIPTION:{_ics_text(desc)}",
+            f"X-STO-DAY:{day}",
+            "END:VEVENT",
+        ]
+        return "".join(_ics_fold(line) for line in lines)
+
+    def _write_file(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._header)
+            for day in sorted(self._blocks):
+                f.write(self._blocks[day])
+            f.write(self._FOOTER.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.rewrites += 1
+
+    def write_events(self, jobs: list[dict]) -> dict[str, object]:
+        out: dict[str, object] = {}
+        touched: set[str] = set()
+        with self._lock:
+            for job in jobs:
+                try:
+                    day = datetime.strptime(job["date_key"], "%d.%m.%Y").strftime("%Y%m%d")
+                    uid = f"{job['order_id']}@sto-bot"
+                    self._days.setdefault(day, {})[uid] = self._vevent(job, uid, day)
+                    touched.add(day)
+                    out[job["order_id"]] = uid
+                except Exception as e:
+                    out[job["order_id"]] = e
+            if touched:
+                for day in touched:
+                    self._blocks[day] = self._render_day(day)
+                self._write_file()
+        return out
@@ -0,0 +1,51 @@
+# capacity.py
+
+
+class IntervalCounter:
+    """
+    Дерево відрізків над n одиницями часу: додати delta на [lo, hi)
+    і максимум на [lo, hi) — обидва за O(log n).
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        size = 1
+        while size < n:
+            size *= 2
+        self._size = size
+        self._max = [0] * (2 * size)
+        self._add = [0] * (2 * size)
+
+    def add(self, lo: int, hi: int, delta: int) -> None:
+        self._update(1, 0, self._size, lo, hi, delta)
+
+    def max(self, lo: int, hi: int) -> int:
+        return self._query(1, 0, self._size, lo, hi)
+
+    def _update(self, node: int, nlo: int, nhi: int, lo: int, hi: int, delta: int) -> None:
+        if hi <= nlo or nhi <= lo:
+            return
+        if lo <= nlo and nhi <= hi:
+            self._max[node] += delta
+            self._add[node] += delta
+            return
+        mid = (nlo + nhi) // 2
+        self._update(2 * node, nlo, mid, lo, hi, delta)
+        self._update(2 * node + 1, mid, nhi, lo, hi, delta)
+        self._max[node] = (
+            max(self._max[2 * node], self._max[2 * node + 1]) + self._add[node]
+        )
+
+    def _query(self, node: int, nlo: int, nhi: int, lo: int, hi: int) -> int:
+        if hi <= nlo or nhi <= lo:
+            return 0
+        if lo <= nlo and nhi <= hi:
+            return self._max[node]
+        mid = (nlo + nhi) // 2
+        return (
+            max(
+                self._query(2 * node, nlo, mid, lo, hi),
+                self._query(2 * node + 1, mid, nhi, lo, hi),
+            )
+            + self._add[node]
+        )
@@ -0,0 +1,162 @@
+# fleet_import.py
+import asyncio
+import csv
+import hashlib
+import re
+import time
+from itertools import islice
+from typing import Iterable, Iterator
+
+from loguru import logger
+
+from bulk_validate import validate_plates, validate_vins
+from plate_api import fetch_plate_info
+from vin_api import fetch_vehicle_by_vin
+
+FLEET_BATCH = 500
+FLEET_CONCURRENCY = 8
+
+
+def fleet_user_id(phone: str, vehicle: str) -> int:
+    """
+    Водії з імпорту ще не мають Telegram ID, тож ключ — від'ємне число
+    з телефону й VIN/номера (справжні user_id завжди додатні). Кожне авто
+    автопарку — окремий «користувач», тож кілька машин з одним телефоном
+    можна записати на той самий час. Повторний імпорт дає ті самі ключі.
+    """
+    digest = hashlib.blake2b(f"{phone}|{vehicle}".encode("utf-8"), digest_size=8).digest()
+    return -(int.from_bytes(digest, "big") >> 2) - 1
+
+
+def read_rows(path: str) -> Iterator[tuple[int, list[str]]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        head = f.readline()
+        delim = ";" if head.count(";") > head.count(",") else ","
+        first = next(csv.reader([head], delimiter=delim), [])
+        line_no = 1
+        if len(first) >= 3 and re.search(r"\d", first[1]):
+            yield line_no, first
+        for row in csv.reader(f, delimiter=delim):
+            line_no += 1
+            if row and any(c.strip() for c in row):
+                yield line_no, row
+
+
+def batched(it: Iterable, n: int) -> Iterator[list]:
+    it = iter(it)
+    while True:
+        chunk = list(islice(it, n))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _phone(raw: str) -> str | None:
+    digits = re.sub(r"\D", "", raw or "")
+    return digits[-10:] if len(digits) >= 10 else None
+
+
+def _validate_batch(rows: list[tuple[int, list[str]]], rejected: dict) -> list[dict]:
+    vehicles = [(r[2] if len(r) > 2 else "") for _, r in rows]
+    is_vin = [len("".join(v.split())) == 17 for v in vehicles]
+    vin_mask, vin_norm = validate_vins([v for v, f in zip(vehicles, is_vin) if f])
+    plate_mask, plate_norm = validate_plates(
+        [v for v, f in zip(vehicles, is_vin) if not f]
+    )
+    vin_it = iter(zip(vin_mask, vin_norm))
+    plate_it = iter(zip(plate_mask, plate_norm))
+
+    out: list[dict] = []
+    for (line_no, row), vin_flag in zip(rows, is_vin):
+        ok, value = next(vin_it) if vin_flag else next(plate_it)
+        full_name = " ".join((row[0] if row else "").split())
+        phone = _phone(row[1] if len(row) > 1 else "")
+        if len(full_name) < 3 or " " not in full_name:
+            rejected["name"] += 1
+        elif not phone:
+            rejected["phone"] += 1
+        elif not ok:
+            rejected["vehicle"] += 1
+        else:
+            out.append(
+                {
+                    "line": line_no,
+                    "full_name": full_name,
+                    "phone": phone,
+                    "vin": value if vin_flag else "",
+                    "plate": "" if vin_flag else value,
+                }
+            )
+    return out
+
+
+async def _enrich(item: dict, sem: asyncio.Semaphore) -> dict:
+    async with sem:
+        try:
+            if item["vin"]:
+                info = await fetch_vehicle_by_vin(item["vin"])
+                if info:
+                    return {k: info.get(k) for k in ("make", "model", "year")}
+            else:
+                info = await fetch_plate_info(item["plate"])
+                if info:
+                    return {
+                        "make": info.get("vendor"),
+                        "model": info.get("model"),
+                        "year": info.get("model_year"),
+                    }
+        except Exception as e:
+            logger.warning(f"[fleet] lookup failed at line {item['line']}: {e}")
+    return {}
+
+
+async def import_fleet(
+    path: str,
+    store,
+    *,
+    batch_size: int = FLEET_BATCH,
+    concurrency: int = FLEET_CONCURRENCY,
+) -> dict:
+    """
+    CSV (ПІБ, телефон, VIN або номер) читається потоково пачками по batch_size:
+    валідація пачки → збагачення з обмеженням concurrency → запис у сховище.
+    У пам'яті одночасно тримається лише одна пачка.
+    """
+    started = time.perf_counter()
+    sem = asyncio.Semaphore(concurrency)
+    rejected = {"name": 0, "phone": 0, "vehicle": 0}
+    total = imported = enriched = 0
+
+    for rows in batched(read_rows(path), batch_size):
+        total += len(rows)
+        valid = _validate_batch(rows, rejected)
+        vehicles = await asyncio.gather(*(_enrich(it, sem) for it in valid))
+        for it, vehicle in zip(valid, vehicles):
+            if vehicle:
+                enriched += 1
+            store.save_user(
+                fleet_user_id(it["phone"], it["vin"] or it["plate"]),
+                {
+                    "full_name": it["full_name"],
+                    "phone": it["phone"],
+                    "vin": it["vin"],
+                    "plate": it["plate"],
+                    "vehicle": vehicle,
+                    "fleet": True,
+                },
+            )
+        imported += len(valid)
+        await store.flush()
+
+    elapsed = time.perf_counter() - started
+    report = {
+        "rows": total,
+        "imported": imported,
+        "enriched": enriched,
+        "rejected": sum(rejected.values()),
+        "rejected_by": rejected,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    logger.info(f"[fleet] import done: {report}")
+    return report
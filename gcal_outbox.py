@@ -0,0 +1,190 @@
+# gcal_outbox.py
+import asyncio
+import heapq
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+
+import metrics
+
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_BASE_DELAY = 2.0
+OUTBOX_MAX_DELAY = 600.0
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_BATCH_WINDOW = 0.2
+
+
+def order_job(date_key: str, rec: dict, user: dict, timezone: str) -> dict:
+    """Завдання для календаря із запису APPOINTMENTS і профілю клієнта."""
+    start_dt = datetime.strptime(
+        f"{date_key} {rec['time']}", "%d.%m.%Y %H:%M"
+    ).replace(tzinfo=ZoneInfo(timezone))
+    veh = user.get("vehicle") or {}
+    car = ", ".join(str(veh[k]) for k in ("make", "model", "year") if veh.get(k))
+    return {
+        "order_id": str(rec["order_id"]),
+        "date_key": date_key,
+        "start": start_dt.isoformat(),
+        "end": (start_dt + timedelta(minutes=rec.get("duration_min", 60))).isoformat(),
+        "customer_name": user.get("full_name", ""),
+        "phone": user.get("phone", ""),
+        "vin": user.get("vin", ""),
+        "car_line": car,
+        "reason": rec.get("reason", ""),
+    }
+
+
+class CalendarOutbox:
+    """
+    Надійна черга записів у календар (див. calendar_backends). Завдання зберігаються в тій самій
+    SQLite, що й записи, тож бронювання не чекає на Google API.
+    Воркер збирає завдання протягом batch_window і віддає writer'у пачкою
+    (до batch_size); невдалі повторює з експоненційною паузою.
+    writer(jobs) повертає order_id → event_id або виняток.
+    """
+
+    def __init__(
+        self,
+        store,
+        writer: Callable[[list[dict]], dict[str, object]],
+        *,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        base_delay: float = OUTBOX_BASE_DELAY,
+        max_delay: float = OUTBOX_MAX_DELAY,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        batch_window: float = OUTBOX_BATCH_WINDOW,
+    ):
+        self.store = store
+        self.writer = writer
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._heap: list[tuple[float, str]] = []
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.synced = 0
+        self.batches = 0
+        self.failed_attempts = 0
+        self.last_lag_sec = 0.0
+        metrics.register("gcal_outbox", self.stats)
+
+    def submit(self, job: dict) -> None:
+        job.setdefault("attempts", 0)
+        job.setdefault("created_at", time.time())
+        job.setdefault("next_at", time.time())
+        self.store.save_outbox(job)
+        self._push(job)
+
+    def _push(self, job: dict) -> None:
+        heapq.heappush(self._heap, (job["next_at"], job["order_id"]))
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self) -> None:
+        self._wake = asyncio.Event()
+        for job in self.store.outbox.values():
+            if not job.get("dead"):
+                heapq.heappush(self._heap, (job["next_at"], job["order_id"]))
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"[gcal_outbox] started, {len(self._heap)} job(s) pending")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            now = time.time()
+            if not self._heap or self._heap[0][0] > now:
+                timeout = self._heap[0][0] - now if self._heap else None
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await asyncio.sleep(self.batch_window)
+            jobs: dict[str, dict] = {}
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now and len(jobs) < self.batch_size:
+                next_at, order_id = heapq.heappop(self._heap)
+                job = self.store.outbox.get(order_id)
+                if job is None or job.get("dead") or job["next_at"] != next_at:
+                    continue
+                jobs[order_id] = job
+            if jobs:
+                await self._process(list(jobs.values()))
+
+    async def _process(self, jobs: list[dict]) -> None:
+        self.batches += 1
+        try:
+            results = await asyncio.to_thread(self.writer, jobs)
+        except Exception as e:
+            for job in jobs:
+                self._retry(job, str(e))
+            return
+
+        for job in jobs:
+            order_id = job["order_id"]
+            event_id = results.get(order_id)
+            if isinstance(event_id, Exception):
+                self._retry(job, str(event_id))
+                continue
+            if not event_id:
+                self._retry(job, "empty event id")
+                continue
+
+            rec = self.store.orders.get(order_id)
+            if rec is not None:
+                rec["gcal_event_id"] = event_id
+                self.store.save_appointment(job["date_key"], rec)
+            self.store.delete_outbox(order_id)
+            self.synced += 1
+            self.last_lag_sec = round(time.time() - job["created_at"], 2)
+            logger.info(f"Календар: подію створено ({event_id}) для #{order_id}")
+
+    def _retry(self, job: dict, error: str) -> None:
+        self.failed_attempts += 1
+        job["attempts"] += 1
+        job["last_error"] = error[:300]
+        if job["attempts"] >= self.max_attempts:
+            job["dead"] = True
+            logger.error(
+                f"[gcal_outbox] #{job['order_id']} gave up after "
+                f"{job['attempts']} attempt(s): {error}"
+            )
+        else:
+            delay = min(self.max_delay, self.base_delay * 2 ** job["attempts"])
+            job["next_at"] = time.time() + random.uniform(delay / 2, delay)
+            logger.warning(
+                f"[gcal_outbox] #{job['order_id']} attempt {job['attempts']} failed, "
+                f"retry in {job['next_at'] - time.time():.0f}s: {error}"
+            )
+            self._push(job)
+        self.store.save_outbox(job)
+
+    def stats(self) -> dict:
+        now = time.time()
+        pending = [j for j in self.store.outbox.values() if not j.get("dead")]
+        oldest = min((j["created_at"] for j in pending), default=None)
+        return {
+            "depth": len(pending),
+            "dead": len(self.store.outbox) - len(pending),
+            "oldest_lag_sec": round(now - oldest, 1) if oldest else 0,
+            "last_sync_lag_sec": self.last_lag_sec,
+            "synced": self.synced,
+            "batches": self.batches,
+            "failed_attempts": self.failed_attempts,
+        }
@@ -0,0 +1,195 @@
+# gcal_reconcile.py
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+
+from gcal_outbox import order_job
+from google_calendar import (
+    batch_delete_events,
+    batch_insert_events,
+    batch_patch_events,
+    batch_restore_events,
+    is_conflict,
+    job_event_body,
+    list_order_events,
+)
+
+RECONCILE_DAYS_BACK = 7
+RECONCILE_DAYS_AHEAD = 120
+RECONCILE_MAX_DELETES = 50
+
+
+def _same_time(ev: dict, body: dict) -> bool:
+    try:
+        return datetime.fromisoformat(ev["start"]["dateTime"]) == datetime.fromisoformat(
+            body["start"]["dateTime"]
+        ) and datetime.fromisoformat(ev["end"]["dateTime"]) == datetime.fromisoformat(
+            body["end"]["dateTime"]
+        )
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+async def reconcile_calendar(
+    store,
+    users: dict,
+    service,
+    calendar_id: str,
+    *,
+    timezone: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    delete_orphans: bool = False,
+    max_deletes: int = RECONCILE_MAX_DELETES,
+) -> dict:
+    """
+    Звірка записів зі Store з подіями календаря за період:
+    один прохід events.list → карта order_id → події, далі пакетно
+    створюємо відсутні, видаляємо дублікати, виправляємо час.
+    Осиротілі події (order_id немає в Store) лише рахуються; видаляються
+    тільки з delete_orphans=True. За один запуск — не більше max_deletes
+    видалень. Записи, які ще чекають у черзі outbox, не чіпаємо.
+    """
+    started = time.perf_counter()
+    tz = ZoneInfo(timezone)
+    today = datetime.now(tz).date()
+    date_from = date_from or today - timedelta(days=RECONCILE_DAYS_BACK)
+    date_to = date_to or today + timedelta(days=RECONCILE_DAYS_AHEAD)
+    time_min = datetime(date_from.year, date_from.month, date_from.day, tzinfo=tz)
+    time_max = datetime(date_to.year, date_to.month, date_to.day, tzinfo=tz) + timedelta(
+        days=1
+    )
+
+    events = await asyncio.to_thread(
+        list_order_events,
+        service,
+        calendar_id,
+        time_min.isoformat(),
+        time_max.isoformat(),
+    )
+    listed = sum(len(v) for v in events.values())
+
+    local: dict[str, tuple[str, dict]] = {}
+    in_range: set[str] = set()
+    for date_key, recs in store.appointments.items():
+        d = datetime.strptime(date_key, "%d.%m.%Y").date()
+        for rec in recs:
+            order_id = str(rec["order_id"])
+            local[order_id] = (date_key, rec)
+            if date_from <= d <= date_to:
+                in_range.add(order_id)
+
+    inserts: dict[str, dict] = {}
+    patches: dict[str, tuple] = {}
+    deletes: dict[str, str] = {}
+    orphans: list[str] = []
+    report = {
+        "missing": 0,
+        "created": 0,
+        "changed": 0,
+        "orphaned": 0,
+        "duplicates": 0,
+        "relinked": 0,
+    }
+
+    for order_id in in_range | events.keys():
+        found = events.get(order_id, [])
+        job = store.outbox.get(order_id)
+        if job is not None and not job.get("dead"):
+            continue
+        if order_id not in local:
+            orphans.extend(ev["id"] for ev in found)
+            report["orphaned"] += len(found)
+            continue
+
+        date_key, rec = local[order_id]
+        body = job_event_body(
+            order_job(date_key, rec, users.get(rec.get("user_id"), {}), timezone)
+        )
+        if not found:
+            inserts[order_id] = body
+            report["missing"] += 1
+            continue
+
+        keep = next((ev for ev in found if ev["id"] == rec.get("gcal_event_id")), found[0])
+        for ev in found:
+            if ev is not keep:
+                deletes[ev["id"]] = ev["id"]
+                report["duplicates"] += 1
+        if keep["id"] != rec.get("gcal_event_id"):
+            rec["gcal_event_id"] = keep["id"]
+            store.save_appointment(date_key, rec)
+            report["relinked"] += 1
+        if not _same_time(keep, body):
+            patches[order_id] = (keep["id"], {"start": body["start"], "end": body["end"]})
+            report["changed"] += 1
+
+    if delete_orphans:
+        for event_id in orphans:
+            deletes.setdefault(event_id, event_id)
+    skipped = max(0, len(deletes) - max_deletes)
+    if skipped:
+        logger.warning(f"[reconcile] {len(deletes)} delete(s), capped at {max_deletes}")
+        deletes = dict(list(deletes.items())[:max_deletes])
+
+    errors = 0
+    deleted = 0
+    if inserts:
+        res = await asyncio.to_thread(
+            batch_insert_events, service, calendar_id, inserts, conflict_ok=False
+        )
+        # 409: id зайнятий видаленою подією — відновлюємо її, а не рахуємо створеною.
+        restores = {
+            order_id: inserts[order_id]
+            for order_id, out in res.items()
+            if is_conflict(out)
+        }
+        if restores:
+            res.update(
+                await asyncio.to_thread(
+                    batch_restore_events, service, calendar_id, restores
+                )
+            )
+        for order_id, event_id in res.items():
+            if isinstance(event_id, Exception) or not event_id:
+                errors += 1
+                logger.warning(f"[reconcile] insert #{order_id} failed: {event_id}")
+                continue
+            report["created"] += 1
+            date_key, rec = local[order_id]
+            rec["gcal_event_id"] = event_id
+            store.save_appointment(date_key, rec)
+            if order_id in store.outbox:
+                store.delete_outbox(order_id)
+    if patches:
+        res = await asyncio.to_thread(batch_patch_events, service, calendar_id, patches)
+        for order_id, out in res.items():
+            if isinstance(out, Exception):
+                errors += 1
+                logger.warning(f"[reconcile] patch #{order_id} failed: {out}")
+    if deletes:
+        res = await asyncio.to_thread(batch_delete_events, service, calendar_id, deletes)
+        for event_id, out in res.items():
+            if isinstance(out, Exception):
+                errors += 1
+                logger.warning(f"[reconcile] delete {event_id} failed: {out}")
+            else:
+                deleted += 1
+
+    report.update(
+        {
+            "date_from": date_from.strftime("%d.%m.%Y"),
+            "date_to": date_to.strftime("%d.%m.%Y"),
+            "orders": len(in_range),
+            "events": listed,
+            "deleted": deleted,
+            "skipped": skipped,
+            "errors": errors,
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+    )
+    logger.info(f"[reconcile] done: {report}")
+    return report
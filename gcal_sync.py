@@ -0,0 +1,230 @@
+# gcal_sync.py
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+
+import metrics
+from google_calendar import SyncTokenExpired
+
+SYNC_STATE_KEY = "gcal"
+
+
+def event_slots(
+    ev: dict, tz: ZoneInfo, hours: Iterable[int]
+) -> list[tuple[str, str]]:
+    """
+    Години (date_key, "HH:00"), які перекриває стороння подія.
+    Наші власні записи (з order_id), скасовані та «вільні» події нічого не блокують.
+    """
+    if ev.get("status") == "cancelled" or ev.get("transparency") == "transparent":
+        return []
+    pvt = (ev.get("extendedProperties") or {}).get("private") or {}
+    if pvt.get("order_id"):
+        return []
+    start, end = ev.get("start") or {}, ev.get("end") or {}
+    hours = list(hours)
+    out: list[tuple[str, str]] = []
+
+    if "date" in start:
+        day = date.fromisoformat(start["date"])
+        last = date.fromisoformat(end.get("date") or start["date"])
+        while True:
+            key = day.strftime("%d.%m.%Y")
+            out.extend((key, f"{h:02d}:00") for h in hours)
+            day += timedelta(days=1)
+            if day >= last:
+                return out
+
+    if "dateTime" not in start or "dateTime" not in end:
+        return []
+    s = datetime.fromisoformat(start["dateTime"]).astimezone(tz)
+    e = datetime.fromisoformat(end["dateTime"]).astimezone(tz)
+    day = s.date()
+    while day <= e.date():
+        key = day.strftime("%d.%m.%Y")
+        for h in hours:
+            slot_start = datetime(day.year, day.month, day.day, h, tzinfo=tz)
+            if slot_start < e and slot_start + timedelta(hours=1) > s:
+                out.append((key, f"{h:02d}:00"))
+        day += timedelta(days=1)
+    return out
+
+
+class CalendarSync:
+    """
+    Інкрементальне підтягування сторонніх подій календаря в blocked.
+    Перший прохід — повний, далі лише зміни за syncToken; 410 → повний прохід.
+    Токен і карта event_id → слоти зберігаються в Store; слоти минулих
+    днів відкидаються (раз на добу), щоб стан не ріс безкінечно.
+    lister(sync_token) повертає (події, nextSyncToken).
+    """
+
+    def __init__(
+        self,
+        store,
+        blocked: dict[str, dict[str, int]],
+        lister: Callable[[str | None], tuple[list[dict], str]],
+        *,
+        timezone: str,
+        hours: Iterable[int],
+        interval: float = 60.0,
+        on_change: Callable[[str | None], None] | None = None,
+    ):
+        self.store = store
+        self.blocked = blocked
+        self.lister = lister
+        self.tz = ZoneInfo(timezone)
+        self.hours = list(hours)
+        self.interval = interval
+        self.on_change = on_change
+        self.sync_token: str | None = None
+        self.events: dict[str, list] = {}
+        self._pruned_on: date | None = None
+        self._task: asyncio.Task | None = None
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.changes = 0
+        self.last_sync_at = 0.0
+        metrics.register("gcal_sync", self.stats)
+
+    def _add(self, slots: list) -> None:
+        for date_key, time_str in slots:
+            day = self.blocked.setdefault(date_key, {})
+            day[time_str] = day.get(time_str, 0) + 1
+            if self.on_change:
+                self.on_change(date_key)
+
+    def _remove(self, slots: list) -> None:
+        for date_key, time_str in slots:
+            day = self.blocked.get(date_key)
+            if not day or time_str not in day:
+                continue
+            day[time_str] -= 1
+            if day[time_str] <= 0:
+                del day[time_str]
+            if not day:
+                del self.blocked[date_key]
+            if self.on_change:
+                self.on_change(date_key)
+
+    def _prune(self, today: date) -> int:
+        """Прибирає слоти до today; повертає кількість змінених подій."""
+        self._pruned_on = today
+        past: dict[str, bool] = {}
+        changed = 0
+        for event_id, slots in list(self.events.items()):
+            old = []
+            for slot in slots:
+                key = slot[0]
+                if key not in past:
+                    past[key] = datetime.strptime(key, "%d.%m.%Y").date() < today
+                if past[key]:
+                    old.append(slot)
+            if not old:
+                continue
+            changed += 1
+            self._remove(old)
+            keep = [slot for slot in slots if not past[slot[0]]]
+            if keep:
+                self.events[event_id] = keep
+            else:
+                del self.events[event_id]
+        return changed
+
+    def _reset(self) -> None:
+        dates = list(self.blocked)
+        self.events.clear()
+        self.blocked.clear()
+        if self.on_change:
+            for date_key in dates:
+                self.on_change(date_key)
+
+    def start(self) -> None:
+        state = self.store.sync_state.get(SYNC_STATE_KEY) or {}
+        self.sync_token = state.get("sync_token")
+        self._reset()
+        for event_id, slots in (state.get("events") or {}).items():
+            self.events[event_id] = slots
+            self._add(slots)
+        if self._prune(datetime.now(self.tz).date()):
+            self.store.save_sync_state(
+                SYNC_STATE_KEY, {"sync_token": self.sync_token, "events": self.events}
+            )
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"[gcal_sync] started, {len(self.events)} external event(s) restored"
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"[gcal_sync] poll failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def poll(self) -> None:
+        full = self.sync_token is None
+        try:
+            items, token = await asyncio.to_thread(self.lister, self.sync_token)
+        except SyncTokenExpired:
+            logger.warning("[gcal_sync] sync token expired, doing a full resync")
+            full = True
+            items, token = await asyncio.to_thread(self.lister, None)
+
+        if full:
+            self._reset()
+            self.full_syncs += 1
+        else:
+            self.incremental_syncs += 1
+
+        for ev in items:
+            event_id = ev.get("id")
+            if not event_id:
+                continue
+            old = self.events.pop(event_id, None)
+            if old:
+                self._remove(old)
+            slots = event_slots(ev, self.tz, self.hours)
+            if slots:
+                self.events[event_id] = slots
+                self._add(slots)
+        self.changes += len(items)
+        self.sync_token = token
+        self.last_sync_at = time.time()
+
+        today = datetime.now(self.tz).date()
+        pruned = self._prune(today) if today != self._pruned_on or full or items else 0
+        if full or items or pruned:
+            self.store.save_sync_state(
+                SYNC_STATE_KEY, {"sync_token": token, "events": self.events}
+            )
+            logger.info(
+                f"[gcal_sync] {'full' if full else 'incremental'} sync: "
+                f"{len(items)} change(s), {len(self.events)} external event(s)"
+            )
+
+    def stats(self) -> dict:
+        return {
+            "external_events": len(self.events),
+            "blocked_slots": sum(len(v) for v in self.blocked.values()),
+            "full_syncs": self.full_syncs,
+            "incremental_syncs": self.incremental_syncs,
+            "changes": self.changes,
+            "last_sync_ago_sec": (
+                round(time.time() - self.last_sync_at, 1) if self.last_sync_at else None
+            ),
+        }
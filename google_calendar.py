@@ -1,22 +1,67 @@
 from __future__ import annotations
+import base64
 from typing import Optional, List, Dict
 from datetime import datetime
 
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+try:
+    import httplib2
+    from google.oauth2.service_account import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import HttpRequest
+
+    HAS_GOOGLE_API = True
+except ImportError:
+    # Без google-api-python-client модуль імпортується, але викликати його не можна
+    # (CALENDAR_BACKEND=ics/memory).
+    HAS_GOOGLE_API = False
+
+    class HttpError(Exception):
+        pass
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
+BATCH_LIMIT = 50
+
+
+class SyncTokenExpired(Exception):
+    """Google відповів 410 Gone — syncToken недійсний, потрібна повна синхронізація."""
+
+
+def _require_google_api() -> None:
+    if not HAS_GOOGLE_API:
+        raise RuntimeError(
+            "google-api-python-client не встановлено — CALENDAR_BACKEND=google недоступний"
+        )
+
+
+def load_credentials(sa_json_path: str) -> Credentials:
+    _require_google_api()
+    return Credentials.from_service_account_file(sa_json_path, scopes=SCOPES)
 
 
-def get_calendar_service(sa_json_path: str):
-    creds = Credentials.from_service_account_file(sa_json_path, scopes=SCOPES)
-    return build("calendar", "v3", credentials=creds)
+def get_calendar_service(
+    sa_json_path: Optional[str] = None, *, credentials: Optional[Credentials] = None
+):
+    """
+    Discovery-документ береться з пакета (static_discovery), без мережі.
+    Кожен запит отримує власний httplib2.Http, тож сервіс можна
+    використовувати з кількох потоків одночасно.
+    """
+    _require_google_api()
+    creds = credentials or load_credentials(sa_json_path)
 
+    def _request_builder(http, *args, **kwargs):
+        return HttpRequest(AuthorizedHttp(creds, http=httplib2.Http()), *args, **kwargs)
 
-def get_service_account_email(sa_json_path: str) -> str:
-    creds = Credentials.from_service_account_file(sa_json_path, scopes=SCOPES)
-    return creds.service_account_email
+    return build(
+        "calendar",
+        "v3",
+        http=AuthorizedHttp(creds, http=httplib2.Http()),
+        requestBuilder=_request_builder,
+        static_discovery=True,
+        cache_discovery=False,
+    )
 
 
 def list_visible_calendars(service) -> List[Dict[str, str]]:
@@ -62,32 +107,19 @@ def _make_description(
     return "\n".join(desc)
 
 
-def create_event(
-    service,
-    calendar_id: str,
-    start_dt: datetime,
-    end_dt: datetime,
-    summary: str,
-    description: str,
-    location: Optional[str] = None,
-) -> str:
-    body = {
-        "summary": summary,
-        "description": description,
-        "start": {"dateTime": start_dt.isoformat()},
-        "end": {"dateTime": end_dt.isoformat()},
-        "reminders": {"useDefault": True},
-    }
-    if location:
-        body["location"] = location
+def order_event_id(order_id: str) -> str:
+    """
+    Детермінований id події для замовлення (base32hex, як вимагає Calendar API):
+    повторна вставка того самого запису дає 409 замість дубліката.
+    """
+    return "sto" + base64.b32hexencode(str(order_id).encode("utf-8")).decode("ascii").lower().rstrip("=")
 
-    event = service.events().insert(calendarId=calendar_id, body=body).execute()
-    return event.get("id")
 
+def is_conflict(res) -> bool:
+    return isinstance(res, HttpError) and getattr(getattr(res, "resp", None), "status", None) == 409
 
-def create_event_for_order(
-    service,
-    calendar_id: str,
+
+def order_event_body(
     *,
     order_id: str,
     start_dt: datetime,
@@ -98,11 +130,12 @@ def create_event_for_order(
     car_line: str,
     reason: str,
     location: Optional[str] = None,
-) -> str:
+) -> Dict:
     summary = f"СТО: {customer_name or 'Клієнт'} — {reason or 'візит'}"
     description = _make_description(order_id, customer_name, phone, vin, car_line, reason)
 
     body = {
+        "id": order_event_id(order_id),
         "summary": summary,
         "description": description,
         "start": {"dateTime": start_dt.isoformat()},
@@ -112,24 +145,168 @@ def create_event_for_order(
     }
     if location:
         body["location"] = location
+    return body
 
-    event = service.events().insert(calendarId=calendar_id, body=body).execute()
-    return event.get("id")
 
+def job_event_body(job: Dict) -> Dict:
+    """Тіло події для завдання з черги запису (start/end — ISO-рядки)."""
+    return order_event_body(
+        order_id=job["order_id"],
+        start_dt=datetime.fromisoformat(job["start"]),
+        end_dt=datetime.fromisoformat(job["end"]),
+        customer_name=job["customer_name"],
+        phone=job["phone"],
+        vin=job["vin"],
+        car_line=job["car_line"],
+        reason=job["reason"],
+    )
 
-def ensure_order_id(service, calendar_id: str, event_id: str, order_id: str) -> None:
-    ev = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
-    ext = ev.get("extendedProperties", {}) or {}
-    pvt = ext.get("private", {}) or {}
-    if pvt.get("order_id") == str(order_id):
-        return
-    pvt["order_id"] = str(order_id)
-    ext["private"] = pvt
-    service.events().patch(
-        calendarId=calendar_id,
-        eventId=event_id,
-        body={"extendedProperties": ext},
-    ).execute()
+
+def _execute_batched(service, requests: List[tuple]) -> Dict[str, object]:
+    """
+    requests: [(key, HttpRequest)]. Відправляє пачками по BATCH_LIMIT
+    через BatchHttpRequest; повертає key → відповідь або виняток.
+    """
+    results: Dict[str, object] = {}
+
+    def _cb(request_id, response, exception):
+        results[request_id] = exception if exception is not None else response
+
+    for i in range(0, len(requests), BATCH_LIMIT):
+        batch = service.new_batch_http_request(callback=_cb)
+        for key, req in requests[i : i + BATCH_LIMIT]:
+            batch.add(req, request_id=str(key))
+        try:
+            batch.execute()
+        except Exception as e:
+            for key, _ in requests[i : i + BATCH_LIMIT]:
+                results.setdefault(str(key), e)
+    return results
+
+
+def batch_insert_events(
+    service, calendar_id: str, bodies: Dict[str, Dict], *, conflict_ok: bool = True
+) -> Dict[str, object]:
+    """
+    409 на тілі з власним id означає, що подію вже вставлено попередньою
+    спробою, — це успіх, а не помилка. З conflict_ok=False 409 повертається
+    як виняток: подія з цим id могла бути видалена (status=cancelled).
+    """
+    reqs = [
+        (key, service.events().insert(calendarId=calendar_id, body=body))
+        for key, body in bodies.items()
+    ]
+    out = _execute_batched(service, reqs)
+    result: Dict[str, object] = {}
+    for key, res in out.items():
+        if isinstance(res, dict):
+            result[key] = res.get("id")
+        elif conflict_ok and is_conflict(res) and bodies[key].get("id"):
+            result[key] = bodies[key]["id"]
+        else:
+            result[key] = res
+    return result
+
+
+def batch_patch_events(
+    service, calendar_id: str, patches: Dict[str, tuple]
+) -> Dict[str, object]:
+    """
+    patches: key → (event_id, часткове тіло події).
+    """
+    reqs = [
+        (key, service.events().patch(calendarId=calendar_id, eventId=event_id, body=body))
+        for key, (event_id, body) in patches.items()
+    ]
+    return _execute_batched(service, reqs)
+
+
+def batch_restore_events(
+    service, calendar_id: str, bodies: Dict[str, Dict]
+) -> Dict[str, object]:
+    """
+    Повертає видалені події з їхнім детермінованим id: patch повним тілом
+    зі status=confirmed. key → id події або виняток.
+    """
+    patches = {}
+    for key, body in bodies.items():
+        patch = {k: v for k, v in body.items() if k != "id"}
+        patches[key] = (body["id"], {**patch, "status": "confirmed"})
+    out = batch_patch_events(service, calendar_id, patches)
+    return {
+        key: res.get("id") if isinstance(res, dict) else res for key, res in out.items()
+    }
+
+
+def batch_delete_events(service, calendar_id: str, event_ids: Dict[str, str]) -> Dict[str, object]:
+    reqs = [
+        (key, service.events().delete(calendarId=calendar_id, eventId=event_id))
+        for key, event_id in event_ids.items()
+    ]
+    return _execute_batched(service, reqs)
+
+
+def list_order_events(
+    service, calendar_id: str, time_min: str, time_max: str
+) -> Dict[str, List[Dict]]:
+    """
+    Усі події за період одним проходом по сторінках;
+    повертає order_id (з extendedProperties.private) → події.
+    """
+    out: Dict[str, List[Dict]] = {}
+    page_token = None
+    while True:
+        resp = service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            maxResults=2500,
+            pageToken=page_token,
+        ).execute()
+        for ev in resp.get("items", []):
+            pvt = (ev.get("extendedProperties") or {}).get("private") or {}
+            order_id = pvt.get("order_id")
+            if order_id:
+                out.setdefault(order_id, []).append(ev)
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return out
+
+
+def list_event_changes(
+    service,
+    calendar_id: str,
+    sync_token: Optional[str] = None,
+    time_min: Optional[str] = None,
+) -> tuple:
+    """
+    Без sync_token — повна вибірка (від time_min), інакше лише зміни з моменту
+    попередньої. Повертає (події, nextSyncToken).
+    """
+    items: List[Dict] = []
+    page_token = None
+    while True:
+        kw = {
+            "calendarId": calendar_id,
+            "singleEvents": True,
+            "maxResults": 2500,
+            "pageToken": page_token,
+        }
+        if sync_token:
+            kw["syncToken"] = sync_token
+        elif time_min:
+            kw["timeMin"] = time_min
+        try:
+            resp = service.events().list(**kw).execute()
+        except HttpError as e:
+            if getattr(e.resp, "status", None) == 410:
+                raise SyncTokenExpired() from e
+            raise
+        items.extend(resp.get("items", []))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return items, resp.get("nextSyncToken")
 
 
 def update_event_append_receipt_link(service, calendar_id: str, event_id: str, receipt_url: str) -> None:
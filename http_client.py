@@ -0,0 +1,51 @@
+# http_client.py
+import os
+from contextlib import asynccontextmanager
+
+import aiohttp
+from loguru import logger
+
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "10"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "30"))
+
+_SESSION: aiohttp.ClientSession | None = None
+
+
+async def start_http_client() -> aiohttp.ClientSession:
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        return _SESSION
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE,
+    )
+    _SESSION = aiohttp.ClientSession(connector=connector)
+    logger.info(
+        f"[http] shared session: limit={HTTP_POOL_LIMIT}, "
+        f"per_host={HTTP_POOL_PER_HOST}, dns_ttl={HTTP_DNS_TTL}s"
+    )
+    return _SESSION
+
+
+async def close_http_client() -> None:
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+        logger.info("[http] shared session closed")
+    _SESSION = None
+
+
+@asynccontextmanager
+async def http_session():
+    """
+    Спільна сесія бота, а якщо її не запущено (скрипти, REPL) — тимчасова.
+    """
+    if _SESSION is not None and not _SESSION.closed:
+        yield _SESSION
+        return
+    async with aiohttp.ClientSession() as session:
+        yield session
@@ -0,0 +1,278 @@
+# lookup_cache.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+import metrics
+
+LOOKUP_CACHE_SIZE = int(os.getenv("LOOKUP_CACHE_SIZE", "5000"))
+LOOKUP_CACHE_TTL = int(os.getenv("LOOKUP_CACHE_TTL", str(24 * 3600)))
+LOOKUP_NEGATIVE_TTL = int(os.getenv("LOOKUP_NEGATIVE_TTL", "300"))
+VEHICLE_DB_MAX_ROWS = int(os.getenv("VEHICLE_DB_MAX_ROWS", "200000"))
+TOUCH_FLUSH_SEC = 30.0
+TOUCH_FLUSH_ROWS = 256
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Обмежений LRU-кеш із TTL. Значення None — негативний запис
+    (404 / некоректна відповідь), живе коротше за звичайний.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        maxsize: int = LOOKUP_CACHE_SIZE,
+        ttl: float = LOOKUP_CACHE_TTL,
+        negative_ttl: float = LOOKUP_NEGATIVE_TTL,
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        metrics.register(f"cache:{name}", self.stats)
+
+    def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return MISSING
+        expires, value = item
+        if expires <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        if value is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    """
+    Об'єднує одночасні однакові запити: HTTP робить лише перший виклик,
+    решта отримують той самий результат або той самий виняток.
+    Якщо лідера скасовано, його місце займає один з тих, хто чекає.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.shared = 0
+        self.takeovers = 0
+        metrics.register(f"singleflight:{name}", self.stats)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while (fut := self._inflight.get(key)) is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(fut)
+            except _LeaderCancelled:
+                self.takeovers += 1
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.set_exception(_LeaderCancelled())
+            fut.exception()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "takeovers": self.takeovers,
+        }
+
+
+class PersistentCache:
+    """
+    Дисковий KV-кеш (SQLite) для даних авто за VIN/номером.
+    Відкривається ліниво, при переповненні видаляє найдавніше використані записи.
+    Кілька кешів ділять одну таблицю: рядки, ліміт max_rows і витіснення —
+    в межах свого kind (name).
+    Усі звернення до SQLite — у потоці (asyncio.to_thread) під спільним lock;
+    accessed_at при читанні оновлюється пачкою, а не окремим записом на кожен hit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        path: str | None = None,
+        max_rows: int = VEHICLE_DB_MAX_ROWS,
+    ):
+        self.name = name
+        self._path = path
+        self.max_rows = max_rows
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}
+        self._touched_at = time.monotonic()
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        metrics.register(f"disk_cache:{name}", self.stats)
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            self._path = os.path.join(os.getenv("DATA_DIR", "./data"), "vehicle_cache.db")
+        return self._path
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vehicle_cache ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL,"
+                " accessed_at REAL NOT NULL, PRIMARY KEY (kind, key))"
+            )
+            conn.execute("DROP INDEX IF EXISTS ix_vehicle_cache_accessed")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_vehicle_cache_kind_accessed"
+                " ON vehicle_cache(kind, accessed_at)"
+            )
+            self._rows = conn.execute(
+                "SELECT COUNT(*) FROM vehicle_cache WHERE kind=?", (self.name,)
+            ).fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    async def get(self, key: str) -> dict | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, value: dict) -> None:
+        data = {k: v for k, v in value.items() if k != "raw"}
+        await asyncio.to_thread(self._put, key, data)
+
+    def _get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT data FROM vehicle_cache WHERE kind=? AND key=?", (self.name, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if (
+                len(self._touched) >= TOUCH_FLUSH_ROWS
+                or time.monotonic() - self._touched_at >= TOUCH_FLUSH_SEC
+            ):
+                self._flush_touched()
+            return json.loads(row[0])
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            db = self._db()
+            db.execute("BEGIN")
+            db.executemany(
+                "UPDATE vehicle_cache SET accessed_at=? WHERE kind=? AND key=?",
+                [(ts, self.name, key) for key, ts in self._touched.items()],
+            )
+            db.execute("COMMIT")
+            self._touched.clear()
+        self._touched_at = time.monotonic()
+
+    def _put(self, key: str, data: dict) -> None:
+        with self._lock:
+            self._touched.pop(key, None)
+            db = self._db()
+            cur = db.execute(
+                "INSERT OR IGNORE INTO vehicle_cache(kind, key, data, accessed_at)"
+                " VALUES(?, ?, ?, ?)",
+                (self.name, key, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+            if cur.rowcount:
+                self._rows += 1
+            else:
+                db.execute(
+                    "UPDATE vehicle_cache SET data=?, accessed_at=? WHERE kind=? AND key=?",
+                    (json.dumps(data, ensure_ascii=False), time.time(), self.name, key),
+                )
+            if self._rows > self.max_rows:
+                self._evict()
+
+    def _evict(self) -> None:
+        self._flush_touched()
+        target = int(self.max_rows * 0.9)
+        cur = self._conn.execute(
+            "DELETE FROM vehicle_cache WHERE rowid IN ("
+            " SELECT rowid FROM vehicle_cache WHERE kind=? ORDER BY accessed_at LIMIT ?)",
+            (self.name, self._rows - target),
+        )
+        n = max(cur.rowcount, 0)
+        self._rows -= n
+        self.evictions += n
+        logger.info(f"[disk_cache] {self.name}: evicted {n} row(s), {self._rows} left")
+
+    def stats(self) -> dict:
+        return {
+            "rows": self._rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
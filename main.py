@@ -1,8 +1,11 @@
 import asyncio
+import calendar
 import os
 import re
+import secrets
+import time
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
+from functools import cache
 from urllib.parse import unquote, urlparse, parse_qs
 import re as _re
 
@@ -21,21 +24,39 @@ from aiogram.types import (
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from dotenv import load_dotenv
 from loguru import logger
-import holidays
 
-from utils_shared import now_local, main_menu, is_admin, normalize_date
+from utils_shared import get_tz, now_local, main_menu, is_admin, normalize_date
 from google_calendar import (
+    HAS_GOOGLE_API,
     get_calendar_service,
     can_access_calendar as gcal_can_access,
     list_visible_calendars as gcal_list_visible,
-    get_service_account_email,
+    load_credentials as gcal_load_credentials,
+    list_event_changes as gcal_list_event_changes,
 )
 from admin import r_admin, init_admin_context
 from payments import r_pay, init_pay_context, set_receipts_dir
 from receipts_store import ensure_receipts_dir
+from storage import Store
+from slots import DEFAULT_DURATION_MIN, SlotIndex
+from working_calendar import WorkingCalendar, parse_hours, parse_weekly
+from availability import AvailabilityIndex, CLOSED
+from markup_cache import MarkupCache
+from http_client import start_http_client, close_http_client
+from background import WorkerPool
+from gcal_outbox import CalendarOutbox, order_job
+from calendar_backends import (
+    CalendarBackend,
+    GoogleCalendarBackend,
+    IcsFeedBackend,
+    MemoryCalendarBackend,
+)
+from gcal_sync import CalendarSync
 from plate_api import fetch_plate_info, plate_format_ok, normalize_plate
 from vin_api import normalize_vin, validate_vin, fetch_vehicle_by_vin
 
+STARTED_AT = time.perf_counter()
+
 load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
@@ -50,8 +71,21 @@ TIMEZONE = os.getenv("TIMEZONE", "Europe/Kyiv")
 RECEIPTS_DIR = os.getenv("RECEIPTS_DIR", "./receipts")
 ensure_receipts_dir(RECEIPTS_DIR)
 
+DATA_DIR = os.getenv("DATA_DIR", "./data")
+STORE_FLUSH_MS = int(os.getenv("STORE_FLUSH_MS", "50"))
+SLOT_HOLD_MINUTES = int(os.getenv("SLOT_HOLD_MINUTES", "5"))
+SERVICE_BAYS = max(1, int(os.getenv("SERVICE_BAYS", "1")))
+WORK_HOURS = os.getenv("WORK_HOURS", "9-20")
+WORK_WEEK = os.getenv("WORK_WEEK", "sun=off")
+GCAL_SYNC_INTERVAL_SEC = int(os.getenv("GCAL_SYNC_INTERVAL_SEC", "60"))
+CALENDAR_BACKEND = os.getenv("CALENDAR_BACKEND", "google").strip().lower()
+ICS_FEED_PATH = os.getenv("ICS_FEED_PATH") or os.path.join(DATA_DIR, "bookings.ics")
+
 BAZAGAI_API_KEY = os.getenv("BAZAGAI_API_KEY", "")
 BAZAGAI_TIMEOUT = int(os.getenv("BAZAGAI_TIMEOUT", "10"))
+REG_LOOKUP_BUDGET_SEC = float(os.getenv("REG_LOOKUP_BUDGET_SEC", "5"))
+VIN_ENRICH_ASYNC = os.getenv("VIN_ENRICH_ASYNC", "0").lower() in ("1", "true", "yes")
+VIN_ENRICH_WORKERS = int(os.getenv("VIN_ENRICH_WORKERS", "4"))
 logger.info(f"BazaGAI timeout={BAZAGAI_TIMEOUT}s, api_key_present={bool(BAZAGAI_API_KEY)}")
 
 if not BOT_TOKEN:
@@ -99,7 +133,9 @@ def normalize_calendar_id(raw: str) -> str:
 GOOGLE_CALENDAR_ID = normalize_calendar_id(GOOGLE_CALENDAR_ID_RAW)
 logger.info(f"Calendar ID in use: {GOOGLE_CALENDAR_ID!r}")
 
-if not (GOOGLE_SERVICE_ACCOUNT_FILE and GOOGLE_CALENDAR_ID):
+if CALENDAR_BACKEND == "google" and not (
+    GOOGLE_SERVICE_ACCOUNT_FILE and GOOGLE_CALENDAR_ID
+):
     logger.warning(
         "Google Calendar не налаштовано (GOOGLE_SERVICE_ACCOUNT_FILE або GOOGLE_CALENDAR_ID відсутні)."
     )
@@ -110,42 +146,63 @@ def _chunked(lst, n):
         yield lst[i : i + n]
 
 
-USERS: dict[int, dict] = {}
-BOOKED: dict[str, set[str]] = {}
-APPOINTMENTS: dict[str, list[dict]] = {}
-
-HOURS_RANGE = list(range(9, 20))
-REASONS = {
-    "oil": "заміна мастила",
-    "diag": "діагностика",
-    "tires": "заміни шин",
-    "other": "інша причина",
+STORE = Store(
+    os.path.join(DATA_DIR, "bot.db"),
+    flush_interval=STORE_FLUSH_MS / 1000,
+)
+USERS: dict[int, dict] = STORE.users
+APPOINTMENTS: dict[str, list[dict]] = STORE.appointments
+ORDERS: dict[str, dict] = STORE.orders
+BLOCKED: dict[str, dict[str, int]] = {}
+VIN_JOBS: dict[int, dict] = {}
+VIN_JOB_TTL_SEC = 30 * 60
+
+WORK_CAL = WorkingCalendar(
+    STORE, weekly=parse_weekly(WORK_WEEK, parse_hours(WORK_HOURS))
+)
+HOURS_RANGE = list(range(WORK_CAL.open_hour, WORK_CAL.close_hour))
+# tag → (назва, тривалість у хвилинах)
+REASONS: dict[str, tuple[str, int]] = {
+    "oil": ("заміна мастила", 30),
+    "diag": ("діагностика", 120),
+    "tires": ("заміни шин", 60),
+    "other": ("інша причина", 60),
 }
-UA_HOLIDAYS_CACHE: dict[int, holidays.HolidayBase] = {}
-
-gcal_service = None
-gcal_enabled = False
+MIN_SERVICE_MIN = min(m for _, m in REASONS.values())
+SLOTS = SlotIndex(
+    APPOINTMENTS,
+    blocked=BLOCKED,
+    hours_mask=WORK_CAL.key_mask,
+    open_hour=HOURS_RANGE[0],
+    close_hour=HOURS_RANGE[-1] + 1,
+    bays=SERVICE_BAYS,
+    hold_ttl_sec=SLOT_HOLD_MINUTES * 60,
+)
+BOOKING_MONTHS_AHEAD = 3
+MONTHS_UA = [
+    "Січень", "Лютий", "Березень", "Квітень", "Травень", "Червень",
+    "Липень", "Серпень", "Вересень", "Жовтень", "Листопад", "Грудень",
+]
+WEEKDAYS_UA = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Нд"]
+
+AVAILABILITY = AvailabilityIndex(
+    SLOTS,
+    is_closed=WORK_CAL.is_closed,
+    minutes=MIN_SERVICE_MIN,
+)
+TIME_KB = MarkupCache("time_kb")
 
-try:
-    from google_calendar import create_event_for_order as gcal_create_event_for_order
 
-    HAS_CREATE_FOR_ORDER = True
-except Exception:
-    gcal_create_event_for_order = None
-    HAS_CREATE_FOR_ORDER = False
+def _schedule_changed(date_key: str | None) -> None:
+    AVAILABILITY.invalidate(date_key)
+    TIME_KB.invalidate(date_key)
 
-try:
-    from google_calendar import create_event as gcal_create_event_basic
-except Exception:
-    gcal_create_event_basic = None
 
-try:
-    from google_calendar import ensure_order_id as gcal_ensure_order_id
+SLOTS.subscribe(_schedule_changed)
+WORK_CAL.subscribe(_schedule_changed)
 
-    HAS_ENSURE_ORDER = True
-except Exception:
-    HAS_ENSURE_ORDER = False
-    gcal_ensure_order_id = None
+gcal_service = None
+gcal_enabled = False
 
 
 class RegStates(StatesGroup):
@@ -169,12 +226,14 @@ class BookStates(StatesGroup):
     reason_other = State()
 
 
+@cache
 def cancel_menu() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[[KeyboardButton(text="Скасувати")]], resize_keyboard=True
     )
 
 
+@cache
 def contact_or_cancel_menu() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -185,39 +244,151 @@ def contact_or_cancel_menu() -> ReplyKeyboardMarkup:
     )
 
 
-def time_inline_kb(date_key: str):
-    taken = BOOKED.get(date_key, set())
-    today_str = now_local(TIMEZONE).strftime("%d.%m.%Y")
-    cur_hour = now_local(TIMEZONE).hour
+def time_inline_kb(date_key: str, user_id: int | None = None):
+    """
+    Розмітка спільна для всіх, хто бачить ту саму дату: ключ — (дата, версія,
+    поточна година для сьогодні, власний hold і власні записи), зміни дати
+    скидають версію.
+    """
+    now = now_local(TIMEZONE)
+    after_hour = now.hour if date_key == now.strftime("%d.%m.%Y") else None
+    own = SLOTS.hold_span(date_key, user_id)
+    mine = SLOTS.user_spans(date_key, user_id)
+
+    def build():
+        times = SLOTS.free_starts(
+            date_key, minutes=MIN_SERVICE_MIN, user_id=user_id, after_hour=after_hour
+        )
+        b = InlineKeyboardBuilder()
+        for row in _chunked(times, 4):
+            b.row(*[InlineKeyboardButton(text=t, callback_data=f"time:{t}") for t in row])
+        b.row(InlineKeyboardButton(text="Назад", callback_data="time_back"))
+        if not times:
+            logger.info(f"На дату {date_key} усі години зайняті або час минув.")
+        return b.as_markup()
+
+    return TIME_KB.get(date_key, (after_hour, own, mine), build)
 
-    times: list[str] = []
-    for h in HOURS_RANGE:
-        if date_key == today_str and h <= cur_hour:
-            continue
-        t = f"{h:02d}:00"
-        if t not in taken:
-            times.append(t)
 
-    b = InlineKeyboardBuilder()
-    for row in _chunked(times, 4):
-        b.row(*[InlineKeyboardButton(text=t, callback_data=f"time:{t}") for t in row])
-    b.row(InlineKeyboardButton(text="Назад", callback_data="time_back"))
+def _add_months(year: int, month: int, n: int) -> tuple[int, int]:
+    k = year * 12 + month - 1 + n
+    return k // 12, k % 12 + 1
 
-    if not times:
-        logger.info(f"На дату {date_key} усі години зайняті або час минув.")
-    return b.as_markup()
 
+def date_picker_kb(year: int, month: int):
+    now = now_local(TIMEZONE)
+    counts = AVAILABILITY.month_view(year, month, now)
+    noop = "cal:noop"
 
-def reasons_inline_kb():
     b = InlineKeyboardBuilder()
+    b.row(InlineKeyboardButton(text="⚡ Найближчий вільний час", callback_data="cal:soonest"))
+    first = (now.year, now.month)
+    last = _add_months(now.year, now.month, BOOKING_MONTHS_AHEAD)
+    prev_ym = _add_months(year, month, -1)
+    next_ym = _add_months(year, month, 1)
     b.row(
-        InlineKeyboardButton(text=REASONS["oil"], callback_data="reason:oil"),
-        InlineKeyboardButton(text=REASONS["diag"], callback_data="reason:diag"),
+        InlineKeyboardButton(
+            text="‹" if prev_ym >= first else " ",
+            callback_data=f"cal:nav:{prev_ym[0]}-{prev_ym[1]}" if prev_ym >= first else noop,
+        ),
+        InlineKeyboardButton(text=f"{MONTHS_UA[month - 1]} {year}", callback_data=noop),
+        InlineKeyboardButton(
+            text="›" if next_ym <= last else " ",
+            callback_data=f"cal:nav:{next_ym[0]}-{next_ym[1]}" if next_ym <= last else noop,
+        ),
     )
+    b.row(*[InlineKeyboardButton(text=w, callback_data=noop) for w in WEEKDAYS_UA])
+
+    for week in calendar.monthcalendar(year, month):
+        row = []
+        for day in week:
+            if day == 0:
+                row.append(InlineKeyboardButton(text=" ", callback_data=noop))
+            elif counts[day - 1] == CLOSED:
+                row.append(InlineKeyboardButton(text="·", callback_data=noop))
+            elif counts[day - 1] == 0:
+                row.append(InlineKeyboardButton(text="✖", callback_data=noop))
+            else:
+                row.append(
+                    InlineKeyboardButton(
+                        text=str(day),
+                        callback_data=f"cal:pick:{day:02d}.{month:02d}.{year}",
+                    )
+                )
+        b.row(*row)
+    return b.as_markup()
+
+
+SOONEST_COUNT = 6
+
+
+def soonest_inline_kb(user_id: int):
+    now = now_local(TIMEZONE)
+    found = AVAILABILITY.next_free(now, SOONEST_COUNT, user_id=user_id)
+    b = InlineKeyboardBuilder()
+    for date_key, t in found:
+        d = datetime.strptime(date_key, "%d.%m.%Y")
+        b.row(
+            InlineKeyboardButton(
+                text=f"{WEEKDAYS_UA[d.weekday()]} {date_key[:5]} о {t}",
+                callback_data=f"soon:{date_key}:{t}",
+            )
+        )
     b.row(
-        InlineKeyboardButton(text=REASONS["tires"], callback_data="reason:tires"),
-        InlineKeyboardButton(text=REASONS["other"], callback_data="reason:other"),
+        InlineKeyboardButton(
+            text="📅 Обрати дату", callback_data=f"cal:nav:{now.year}-{now.month}"
+        )
+    )
+    return b.as_markup(), bool(found)
+
+
+def _soonest_text(found: bool) -> str:
+    if found:
+        return "⚡ Найближчий вільний час:"
+    return "На найближчі місяці вільного часу немає. Обери дату в календарі."
+
+
+OWN_BOOKING_TEXT = "У тебе вже є запис на цей час."
+
+
+def _slot_busy_text(date_key: str, time_str: str, user_id: int, minutes: int, text: str) -> str:
+    if SLOTS.overlaps_own(date_key, time_str, user_id, minutes=minutes):
+        return OWN_BOOKING_TEXT
+    return text
+
+
+DATE_PICKER_TEXT = "📅 Обери дату (✖ — усе зайнято, · — вихідний або минула дата):"
+
+
+def reasons_inline_kb(
+    date_key: str | None = None,
+    time_str: str | None = None,
+    user_id: int | None = None,
+):
+    """Лише послуги, які влазять у вибраний час з урахуванням тривалості."""
+    return _reasons_markup(
+        tuple(
+            tag
+            for tag, (_, minutes) in REASONS.items()
+            if date_key is None
+            or SLOTS.is_free(date_key, time_str, user_id, minutes=minutes)
+        )
     )
+
+
+@cache
+def _reasons_markup(tags: tuple[str, ...]):
+    b = InlineKeyboardBuilder()
+    for row in _chunked(tags, 2):
+        b.row(
+            *[
+                InlineKeyboardButton(
+                    text=f"{REASONS[tag][0]} · {REASONS[tag][1]} хв",
+                    callback_data=f"reason:{tag}",
+                )
+                for tag in row
+            ]
+        )
     b.row(InlineKeyboardButton(text="Назад", callback_data="reason_back"))
     return b.as_markup()
 
@@ -227,6 +398,8 @@ r = Router()
 
 @r.message(CommandStart())
 async def cmd_start(m: Message, state: FSMContext):
+    SLOTS.release_hold(m.from_user.id)
+    VIN_JOBS.pop(m.from_user.id, None)
     await state.clear()
     is_reg = m.from_user.id in USERS
     await m.answer(
@@ -328,20 +501,7 @@ async def reg_choose_plate(cq: CallbackQuery, state: FSMContext):
     await cq.answer()
 
 
-@r.message(RegStates.vin, F.text)
-async def reg_vin(m: Message, state: FSMContext):
-    raw_vin = (m.text or "").strip()
-    if raw_vin == "Скасувати":
-        await cancel_any(m, state)
-        return
-
-    vin = normalize_vin(raw_vin)
-    if not validate_vin(vin):
-        await m.answer("❌ VIN-код некоректний. Перевір, будь ласка, ще раз.")
-        return
-
-    extra = await fetch_vehicle_by_vin(vin)
-
+def _vehicle_from_lookup(extra: dict | None) -> dict:
     vehicle_data: dict = {}
     if isinstance(extra, dict):
         if isinstance(extra.get("vehicle"), dict):
@@ -361,9 +521,13 @@ async def reg_vin(m: Message, state: FSMContext):
         or vehicle_data.get("year_of_manufacture")
         or "—"
     )
+    return {"make": make, "model": model or None, "year": year}
 
-    vehicle = {"make": make, "model": model or None, "year": year}
-    await state.update_data(vin=vin, vehicle_guess=vehicle)
+
+def _vehicle_line(vin: str, vehicle: dict) -> str:
+    make = vehicle.get("make")
+    model = vehicle.get("model")
+    year = vehicle.get("year")
 
     title_parts: list[str] = []
     if make and make != "—":
@@ -377,18 +541,12 @@ async def reg_vin(m: Message, state: FSMContext):
         title = vin
 
     if year and year != "—":
-        found_line = f"{title}, {year}"
-    else:
-        found_line = title
+        return f"{title}, {year}"
+    return title
 
-    if extra is None:
-        main_text = (
-            "VIN підтверджено.\n"
-            "Марку/модель автоматично не знайшов, але VIN валідний."
-        )
-    else:
-        main_text = f"VIN підтверджено.\nЗнайшов авто: {found_line}"
 
+@cache
+def _vin_confirm_kb():
     kb = InlineKeyboardBuilder()
     kb.row(
         InlineKeyboardButton(
@@ -398,23 +556,152 @@ async def reg_vin(m: Message, state: FSMContext):
             text="❌ Ні, ввести інший VIN", callback_data="vin:confirm_no"
         ),
     )
+    return kb.as_markup()
+
+
+VIN_NOT_FOUND_TEXT = (
+    "VIN підтверджено.\n"
+    "Марку/модель автоматично не знайшов, але VIN валідний."
+)
+
+
+@r.message(RegStates.vin, F.text)
+async def reg_vin(m: Message, state: FSMContext):
+    raw_vin = (m.text or "").strip()
+    if raw_vin == "Скасувати":
+        await cancel_any(m, state)
+        return
+
+    vin = normalize_vin(raw_vin)
+    if not validate_vin(vin):
+        await m.answer("❌ VIN-код некоректний. Перевір, будь ласка, ще раз.")
+        return
+
+    if VIN_ENRICH_ASYNC and VIN_ENRICHER.running:
+        preview = await fetch_vehicle_by_vin(vin)
+        await state.update_data(
+            vin=vin, vehicle_guess=_vehicle_from_lookup(preview) if preview else None
+        )
+        if preview:
+            head = (
+                f"VIN підтверджено.\nАвто: {_vehicle_line(vin, _vehicle_from_lookup(preview))}"
+                "\nУточнюю модель…"
+            )
+        else:
+            head = "VIN підтверджено.\nШукаю марку/модель…"
+        sent = await m.answer(
+            head + "\n\nПідтверджуєш?",
+            reply_markup=_vin_confirm_kb(),
+        )
+        job = {
+            "bot": m.bot,
+            "user_id": m.from_user.id,
+            "vin": vin,
+            "chat_id": sent.chat.id,
+            "message_id": sent.message_id,
+            "vehicle": None,
+            "confirmed": False,
+            "state": state,
+            "created": time.monotonic(),
+        }
+        _prune_vin_jobs()
+        VIN_JOBS[m.from_user.id] = job
+        await state.set_state(RegByVinConfirm.confirm)
+        if not VIN_ENRICHER.submit(job):
+            await enrich_vin_job(job)
+        return
+
+    extra = await fetch_vehicle_by_vin(vin)
+    vehicle = _vehicle_from_lookup(extra)
+    await state.update_data(vin=vin, vehicle_guess=vehicle)
+
+    if extra is None:
+        main_text = VIN_NOT_FOUND_TEXT
+    else:
+        main_text = f"VIN підтверджено.\nЗнайшов авто: {_vehicle_line(vin, vehicle)}"
 
     await m.answer(
         main_text + "\n\nПідтверджуєш?",
-        reply_markup=kb.as_markup(),
+        reply_markup=_vin_confirm_kb(),
     )
     await state.set_state(RegByVinConfirm.confirm)
 
+
+def _prune_vin_jobs() -> None:
+    """Прибирає завдання, покинуті на кроці підтвердження VIN."""
+    cutoff = time.monotonic() - VIN_JOB_TTL_SEC
+    for uid in [uid for uid, job in VIN_JOBS.items() if job["created"] < cutoff]:
+        VIN_JOBS.pop(uid, None)
+
+
+async def enrich_vin_job(job: dict) -> None:
+    uid, vin = job["user_id"], job["vin"]
+    extra = None
+    try:
+        extra = await fetch_vehicle_by_vin(vin, need_model=True)
+    except Exception as e:
+        logger.error(f"auto.dev fetch error: {e}")
+    vehicle = _vehicle_from_lookup(extra)
+    job["vehicle"] = vehicle
+
+    if VIN_JOBS.get(uid) is job and not job["confirmed"]:
+        if await job["state"].get_state() != RegByVinConfirm.confirm.state:
+            VIN_JOBS.pop(uid, None)
+            logger.info(f"enrich_vin_job: {uid} left VIN confirm, skip edit")
+            return
+        if extra is None:
+            text = VIN_NOT_FOUND_TEXT
+        else:
+            text = f"VIN підтверджено.\nЗнайшов авто: {_vehicle_line(vin, vehicle)}"
+        await job["bot"].edit_message_text(
+            text + "\n\nПідтверджуєш?",
+            chat_id=job["chat_id"],
+            message_id=job["message_id"],
+            reply_markup=_vin_confirm_kb(),
+        )
+        if VIN_JOBS.get(uid) is job and not job["confirmed"]:
+            return
+
+    user = USERS.get(uid)
+    if not user or user.get("vin") != vin:
+        return
+    VIN_JOBS.pop(uid, None)
+    if extra is not None:
+        STORE.save_user(uid, {**user, "vehicle": vehicle})
+        text = f"Реєстрацію завершено ✅\nАвто: {_vehicle_line(vin, vehicle)}"
+    else:
+        text = "Реєстрацію завершено ✅"
+    await job["bot"].edit_message_text(
+        text, chat_id=job["chat_id"], message_id=job["message_id"]
+    )
+
+
+VIN_ENRICHER = WorkerPool(
+    "vin-enrich", enrich_vin_job, workers=VIN_ENRICH_WORKERS
+)
+
+
 @r.callback_query(RegByVinConfirm.confirm, F.data == "vin:confirm_yes")
 async def reg_vin_confirm_yes(cq: CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    USERS[cq.from_user.id] = {
-        "full_name": data.get("full_name"),
-        "phone": data.get("phone"),
-        "vin": data.get("vin"),
-        "plate": "",
-        "vehicle": data.get("vehicle_guess") or {},
-    }
+    vehicle = data.get("vehicle_guess")
+    job = VIN_JOBS.get(cq.from_user.id)
+    if job and job["vin"] == data.get("vin"):
+        if job["vehicle"] is not None:
+            vehicle = job["vehicle"]
+            VIN_JOBS.pop(cq.from_user.id, None)
+        else:
+            job["confirmed"] = True
+    STORE.save_user(
+        cq.from_user.id,
+        {
+            "full_name": data.get("full_name"),
+            "phone": data.get("phone"),
+            "vin": data.get("vin"),
+            "plate": "",
+            "vehicle": vehicle or {},
+        },
+    )
     await state.clear()
     await cq.message.edit_text("Реєстрацію завершено ✅")
     await cq.message.answer(
@@ -426,6 +713,7 @@ async def reg_vin_confirm_yes(cq: CallbackQuery, state: FSMContext):
 
 @r.callback_query(RegByVinConfirm.confirm, F.data == "vin:confirm_no")
 async def reg_vin_confirm_no(cq: CallbackQuery, state: FSMContext):
+    VIN_JOBS.pop(cq.from_user.id, None)
     await state.set_state(RegStates.vin)
     await cq.message.edit_text("Введи інший VIN (17 символів):")
     await cq.answer()
@@ -444,7 +732,10 @@ async def reg_plate_enter(m: Message, state: FSMContext):
     info = None
     try:
         info = await fetch_plate_info(
-            plate, BAZAGAI_API_KEY, timeout_sec=BAZAGAI_TIMEOUT
+            plate,
+            BAZAGAI_API_KEY,
+            timeout_sec=BAZAGAI_TIMEOUT,
+            budget_sec=REG_LOOKUP_BUDGET_SEC,
         )
     except Exception as e:
         logger.error(f"Baza-GAI fetch error: {e}")
@@ -485,13 +776,16 @@ async def reg_plate_enter(m: Message, state: FSMContext):
 @r.callback_query(RegByPlateStates.confirm, F.data == "plate:confirm_yes")
 async def reg_plate_confirm_yes(cq: CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    USERS[cq.from_user.id] = {
-        "full_name": data.get("full_name"),
-        "phone": data.get("phone"),
-        "vin": "",
-        "plate": data.get("plate"),
-        "vehicle": data.get("vehicle_guess") or {},
-    }
+    STORE.save_user(
+        cq.from_user.id,
+        {
+            "full_name": data.get("full_name"),
+            "phone": data.get("phone"),
+            "vin": "",
+            "plate": data.get("plate"),
+            "vehicle": data.get("vehicle_guess") or {},
+        },
+    )
     await state.clear()
     await cq.message.edit_text("Реєстрацію завершено ✅")
     await cq.message.answer(
@@ -516,6 +810,8 @@ async def reg_plate_confirm_no(cq: CallbackQuery, state: FSMContext):
 
 @r.message(F.text == "Скасувати")
 async def cancel_any(m: Message, state: FSMContext):
+    SLOTS.release_hold(m.from_user.id)
+    VIN_JOBS.pop(m.from_user.id, None)
     await state.clear()
     await m.answer(
         "Дію скасовано. Повертаю в головне меню.",
@@ -533,10 +829,36 @@ async def start_booking(m: Message, state: FSMContext):
         return
     await state.set_state(BookStates.date)
     await m.answer(
-        "Введи дату *dd.mm* або *dd.mm.yy*:",
+        "Введи дату *dd.mm* або *dd.mm.yy*, або обери в календарі:",
         reply_markup=cancel_menu(),
         parse_mode="Markdown",
     )
+    now = now_local(TIMEZONE)
+    await m.answer(DATE_PICKER_TEXT, reply_markup=date_picker_kb(now.year, now.month))
+
+
+@r.message(F.text == "⚡ Найближчий вільний час")
+async def start_booking_soonest(m: Message, state: FSMContext):
+    if m.from_user.id not in USERS:
+        await m.answer(
+            "Спочатку зареєструйся, будь ласка.",
+            reply_markup=main_menu(False),
+        )
+        return
+    SLOTS.release_hold(m.from_user.id)
+    await state.set_state(BookStates.date)
+    await m.answer("Шукаю найближчий вільний час…", reply_markup=cancel_menu())
+    kb, found = soonest_inline_kb(m.from_user.id)
+    await m.answer(_soonest_text(found), reply_markup=kb)
+
+
+def _date_unavailable(date_key: str) -> str | None:
+    dt = datetime.strptime(date_key, "%d.%m.%Y").replace(tzinfo=get_tz(TIMEZONE))
+    if dt.date() < now_local(TIMEZONE).date():
+        return "❌ Не можна записуватись на минулу дату. Обери іншу."
+    if WORK_CAL.is_closed(dt.date()):
+        return f"❌ На {date_key} запис недоступний. Обери іншу дату."
+    return None
 
 
 @r.message(BookStates.date, F.text)
@@ -549,29 +871,82 @@ async def get_date(m: Message, state: FSMContext):
         )
         return
 
-    dt = datetime.strptime(date_key, "%d.%m.%Y").replace(tzinfo=ZoneInfo(TIMEZONE))
-    now = now_local(TIMEZONE)
+    err = _date_unavailable(date_key)
+    if err:
+        await m.answer(err, reply_markup=cancel_menu())
+        return
 
-    if dt.date() < now.date():
-        await m.answer(
-            "❌ Не можна записуватись на минулу дату. Обери іншу.",
-            reply_markup=cancel_menu(),
+    await state.update_data(date_key=date_key)
+    await state.set_state(BookStates.time)
+    await m.answer(
+        f"Оберіть час на {date_key}:",
+        reply_markup=time_inline_kb(date_key, m.from_user.id),
+    )
+
+
+@r.callback_query(BookStates.date, F.data.startswith("cal:"))
+async def pick_date(cq: CallbackQuery, state: FSMContext):
+    _, action, arg = (cq.data.split(":", 2) + [""])[:3]
+    if action == "nav":
+        year, month = map(int, arg.split("-"))
+        await cq.message.edit_text(
+            DATE_PICKER_TEXT, reply_markup=date_picker_kb(year, month)
         )
+        await cq.answer()
+        return
+    if action == "soonest":
+        kb, found = soonest_inline_kb(cq.from_user.id)
+        await cq.message.edit_text(_soonest_text(found), reply_markup=kb)
+        await cq.answer()
+        return
+    if action != "pick":
+        await cq.answer()
         return
 
-    if _is_closed_day(dt):
-        await m.answer(
-            f"❌ На {date_key} запис недоступний. Обери іншу дату.",
-            reply_markup=cancel_menu(),
+    err = _date_unavailable(arg)
+    if err:
+        await cq.answer(err, show_alert=True)
+        return
+    await state.update_data(date_key=arg)
+    await state.set_state(BookStates.time)
+    await cq.message.edit_text(
+        f"Оберіть час на {arg}:",
+        reply_markup=time_inline_kb(arg, cq.from_user.id),
+    )
+    await cq.answer()
+
+
+@r.callback_query(BookStates.date, F.data.startswith("soon:"))
+async def pick_soonest(cq: CallbackQuery, state: FSMContext):
+    _, date_key, time_str = cq.data.split(":", 2)
+    start_dt = datetime.strptime(
+        f"{date_key} {time_str}", "%d.%m.%Y %H:%M"
+    ).replace(tzinfo=get_tz(TIMEZONE))
+    if start_dt <= now_local(TIMEZONE) or not SLOTS.hold(
+        date_key, time_str, cq.from_user.id, minutes=MIN_SERVICE_MIN
+    ):
+        await cq.answer(
+            _slot_busy_text(
+                date_key, time_str, cq.from_user.id, MIN_SERVICE_MIN, "Цей час уже зайнятий 😕"
+            ),
+            show_alert=True,
         )
+        kb, found = soonest_inline_kb(cq.from_user.id)
+        await cq.message.edit_text(_soonest_text(found), reply_markup=kb)
         return
 
-    await state.update_data(date_key=date_key)
+    await state.update_data(date_key=date_key, time_str=time_str)
     await state.set_state(BookStates.time)
-    await m.answer(
-        f"Оберіть час (09–19) на {date_key}:",
-        reply_markup=time_inline_kb(date_key),
+    await cq.message.edit_text(
+        f"Обери причину візиту на {date_key} о {time_str}:",
+        reply_markup=reasons_inline_kb(date_key, time_str, cq.from_user.id),
     )
+    await cq.answer()
+
+
+@r.callback_query(F.data.startswith(("cal:", "soon:")))
+async def pick_date_stale(cq: CallbackQuery, state: FSMContext):
+    await cq.answer()
 
 
 @r.callback_query(BookStates.time, F.data.startswith("time:"))
@@ -583,7 +958,7 @@ async def pick_time(cq: CallbackQuery, state: FSMContext):
     try:
         start_dt = datetime.strptime(
             f"{date_key} {time_str}", "%d.%m.%Y %H:%M"
-        ).replace(tzinfo=ZoneInfo(TIMEZONE))
+        ).replace(tzinfo=get_tz(TIMEZONE))
     except ValueError:
         await cq.answer("Некоректний час.", show_alert=True)
         return
@@ -591,34 +966,43 @@ async def pick_time(cq: CallbackQuery, state: FSMContext):
     if start_dt <= now_local(TIMEZONE):
         await cq.answer("Цей час уже минув. Обери інший.", show_alert=True)
         await cq.message.edit_text(
-            f"Оберіть час (09–19) на {date_key}:",
-            reply_markup=time_inline_kb(date_key),
+            f"Оберіть час на {date_key}:",
+            reply_markup=time_inline_kb(date_key, cq.from_user.id),
         )
         return
 
-    taken = BOOKED.get(date_key, set())
-    if time_str in taken:
-        await cq.answer("Ця година вже зайнята 😕", show_alert=True)
+    if not SLOTS.hold(date_key, time_str, cq.from_user.id, minutes=MIN_SERVICE_MIN):
+        await cq.answer(
+            _slot_busy_text(
+                date_key, time_str, cq.from_user.id, MIN_SERVICE_MIN, "Ця година вже зайнята 😕"
+            ),
+            show_alert=True,
+        )
         await cq.message.edit_text(
             f"Оберіть інший час на {date_key}:",
-            reply_markup=time_inline_kb(date_key),
+            reply_markup=time_inline_kb(date_key, cq.from_user.id),
         )
         return
 
     await state.update_data(time_str=time_str)
     await cq.message.edit_text(
         f"Обери причину візиту на {date_key} о {time_str}:",
-        reply_markup=reasons_inline_kb(),
+        reply_markup=reasons_inline_kb(date_key, time_str, cq.from_user.id),
     )
     await cq.answer()
 
 
 @r.callback_query(BookStates.time, F.data == "time_back")
 async def time_back(cq: CallbackQuery, state: FSMContext):
+    SLOTS.release_hold(cq.from_user.id)
+    data = await state.get_data()
     await state.set_state(BookStates.date)
+    try:
+        d = datetime.strptime(data.get("date_key", ""), "%d.%m.%Y")
+    except ValueError:
+        d = now_local(TIMEZONE)
     await cq.message.edit_text(
-        "Введи нову дату *dd.mm* або *dd.mm.yy*:",
-        parse_mode="Markdown",
+        DATE_PICKER_TEXT, reply_markup=date_picker_kb(d.year, d.month)
     )
     await cq.answer()
 
@@ -630,8 +1014,8 @@ async def pick_reason(cq: CallbackQuery, state: FSMContext):
         date_key: str = data.get("date_key")
         await state.set_state(BookStates.time)
         await cq.message.edit_text(
-            f"Оберіть час (09–19) на {date_key}:",
-            reply_markup=time_inline_kb(date_key),
+            f"Оберіть час на {date_key}:",
+            reply_markup=time_inline_kb(date_key, cq.from_user.id),
         )
         await cq.answer()
         return
@@ -647,25 +1031,32 @@ async def pick_reason(cq: CallbackQuery, state: FSMContext):
         await cq.answer()
         return
 
-    reason = REASONS.get(tag)
-    if not reason:
+    if tag not in REASONS:
         await cq.answer("Невідома причина", show_alert=True)
         return
+    reason, minutes = REASONS[tag]
 
     ok = await finalize_booking(
         user_id=cq.from_user.id,
         date_key=date_key,
         time_str=time_str,
         reason=reason,
+        minutes=minutes,
     )
     if not ok:
         await cq.answer(
-            "Цей слот недоступний (можливо, час уже минув або його зайняли).",
+            _slot_busy_text(
+                date_key,
+                time_str,
+                cq.from_user.id,
+                minutes,
+                "Цей слот недоступний (можливо, час уже минув або його зайняли).",
+            ),
             show_alert=True,
         )
         await cq.message.edit_text(
             f"Оберіть інший час на {date_key}:",
-            reply_markup=time_inline_kb(date_key),
+            reply_markup=time_inline_kb(date_key, cq.from_user.id),
         )
         return
 
@@ -696,12 +1087,19 @@ async def reason_other_text(m: Message, state: FSMContext):
         date_key=date_key,
         time_str=time_str,
         reason=reason,
+        minutes=REASONS["other"][1],
     )
     if not ok:
         await m.answer(
-            "Цей слот недоступний (можливо, час уже минув або його зайняли). "
-            "Обери інший:",
-            reply_markup=time_inline_kb(date_key),
+            _slot_busy_text(
+                date_key,
+                time_str,
+                m.from_user.id,
+                REASONS["other"][1],
+                "Цей слот недоступний (можливо, час уже минув або його зайняли).",
+            )
+            + " Обери інший:",
+            reply_markup=time_inline_kb(date_key, m.from_user.id),
         )
         await state.set_state(BookStates.time)
         return
@@ -717,29 +1115,73 @@ async def reason_other_text(m: Message, state: FSMContext):
     )
 
 
-def _get_ua_holidays(year: int) -> holidays.HolidayBase:
-    if year not in UA_HOLIDAYS_CACHE:
-        UA_HOLIDAYS_CACHE[year] = holidays.country_holidays("UA", years=year)
-    return UA_HOLIDAYS_CACHE[year]
+def _gen_order_id(date_key: str, time_str: str, user_id: int) -> str:
+    dt = datetime.strptime(f"{date_key} {time_str}", "%d.%m.%Y %H:%M")
+    while True:
+        order_id = f"{dt.strftime('%Y%m%d-%H%M')}-{user_id}-{secrets.token_hex(2)}"
+        if order_id not in ORDERS:
+            return order_id
+
+
+def _make_calendar_backend() -> CalendarBackend | None:
+    if CALENDAR_BACKEND == "google":
+        if not HAS_GOOGLE_API:
+            logger.error(
+                "CALENDAR_BACKEND=google, але google-api-python-client не встановлено — "
+                "календар вимкнено."
+            )
+            return None
+        return GoogleCalendarBackend(GOOGLE_CALENDAR_ID)
+    if CALENDAR_BACKEND == "ics":
+        return IcsFeedBackend(ICS_FEED_PATH)
+    if CALENDAR_BACKEND == "memory":
+        return MemoryCalendarBackend()
+    if CALENDAR_BACKEND not in ("", "none", "off"):
+        logger.warning(f"Невідомий CALENDAR_BACKEND={CALENDAR_BACKEND!r} — календар вимкнено.")
+    return None
 
 
-def _is_closed_day(dt: datetime) -> bool:
-    if dt.weekday() == 6:
-        return True
-    ua = _get_ua_holidays(dt.year)
-    if dt.date() in ua:
-        return True
-    return False
+CAL_BACKEND = _make_calendar_backend()
 
 
-def _gen_order_id(date_key: str, time_str: str, user_id: int) -> str:
-    dt = datetime.strptime(f"{date_key} {time_str}", "%d.%m.%Y %H:%M")
-    return f"{dt.strftime('%Y%m%d-%H%M')}-{user_id}"
+def _write_calendar_events(jobs: list[dict]) -> dict[str, object]:
+    return CAL_BACKEND.write_events(jobs)
+
+
+CALENDAR_OUTBOX = CalendarOutbox(STORE, _write_calendar_events)
+
+
+def _gcal_list_changes(sync_token: str | None):
+    time_min = None
+    if not sync_token:
+        time_min = (now_local(TIMEZONE) - timedelta(days=1)).isoformat()
+    return gcal_list_event_changes(
+        gcal_service, GOOGLE_CALENDAR_ID, sync_token, time_min=time_min
+    )
+
+
+GCAL_SYNC = CalendarSync(
+    STORE,
+    BLOCKED,
+    _gcal_list_changes,
+    timezone=TIMEZONE,
+    hours=HOURS_RANGE,
+    interval=GCAL_SYNC_INTERVAL_SEC,
+    on_change=_schedule_changed,
+)
 
 
 async def finalize_booking(
-    user_id: int, date_key: str, time_str: str, reason: str
+    user_id: int,
+    date_key: str,
+    time_str: str,
+    reason: str,
+    minutes: int = DEFAULT_DURATION_MIN,
 ) -> bool:
+    """
+    Від перевірки слота до запису в Store й outbox немає жодного await,
+    тож паралельні виклики не можуть вклинитися між ними.
+    """
     if not date_key or not time_str:
         logger.debug("finalize_booking: empty date/time")
         return False
@@ -747,7 +1189,7 @@ async def finalize_booking(
     try:
         start_dt = datetime.strptime(
             f"{date_key} {time_str}", "%d.%m.%Y %H:%M"
-        ).replace(tzinfo=ZoneInfo(TIMEZONE))
+        ).replace(tzinfo=get_tz(TIMEZONE))
     except ValueError:
         logger.debug("finalize_booking: bad datetime parse")
         return False
@@ -756,154 +1198,152 @@ async def finalize_booking(
         logger.info(f"finalize_booking: past slot rejected → {date_key} {time_str}")
         return False
 
-    if _is_closed_day(start_dt):
+    if WORK_CAL.is_closed(start_dt.date()):
         logger.info(f"finalize_booking: closed day rejected → {date_key}")
         return False
 
-    taken = BOOKED.setdefault(date_key, set())
-    if time_str in taken:
+    if SLOTS.overlaps_own(date_key, time_str, user_id, minutes=minutes):
+        logger.info(f"finalize_booking: {user_id} already booked → {date_key} {time_str}")
+        return False
+
+    if not SLOTS.reserve(date_key, time_str, user_id, minutes=minutes):
         logger.info(f"finalize_booking: already taken → {date_key} {time_str}")
         return False
 
-    taken.add(time_str)
-    order_id = _gen_order_id(date_key, time_str, user_id)
-    rec = {
-        "time": time_str,
-        "user_id": user_id,
-        "reason": reason,
-        "order_id": order_id,
-        "amount_uah": 0,
-    }
-    APPOINTMENTS.setdefault(date_key, []).append(rec)
-
-    if gcal_enabled and gcal_service and GOOGLE_CALENDAR_ID:
-        try:
-            user = USERS.get(user_id, {})
-            end_dt = start_dt + timedelta(hours=1)
-            fio = user.get("full_name", "")
-            phone = user.get("phone", "")
-            vin = user.get("vin", "")
-            veh = user.get("vehicle") or {}
-            car = (
-                ", ".join(
-                    [str(veh.get(k)) for k in ("make", "model", "year") if veh.get(k)]
-                )
-                if veh
-                else ""
-            )
-            if HAS_CREATE_FOR_ORDER and gcal_create_event_for_order:
-                event_id = await asyncio.to_thread(
-                    gcal_create_event_for_order,
-                    gcal_service,
-                    GOOGLE_CALENDAR_ID,
-                    order_id=order_id,
-                    start_dt=start_dt,
-                    end_dt=end_dt,
-                    customer_name=fio,
-                    phone=phone,
-                    vin=vin,
-                    car_line=car,
-                    reason=reason,
-                    location=None,
-                )
-            elif gcal_create_event_basic:
-                summary = f"СТО: {fio} — {reason}"
-                description = (
-                    f"Замовлення: #{order_id}\n"
-                    f"Клієнт: {fio}\n"
-                    f"Телефон: +380{phone}\n"
-                    f"VIN: {vin or '—'}\n"
-                    f"Авто: {car or '—'}\n"
-                    f"Причина: {reason}"
-                )
-                event_id = await asyncio.to_thread(
-                    gcal_create_event_basic,
-                    gcal_service,
-                    GOOGLE_CALENDAR_ID,
-                    start_dt,
-                    end_dt,
-                    summary,
-                    description,
-                )
-                if HAS_ENSURE_ORDER and gcal_ensure_order_id and event_id:
-                    await asyncio.to_thread(
-                        gcal_ensure_order_id,
-                        gcal_service,
-                        GOOGLE_CALENDAR_ID,
-                        event_id,
-                        order_id,
-                    )
-            else:
-                event_id = ""
+    try:
+        order_id = _gen_order_id(date_key, time_str, user_id)
+        rec = {
+            "time": time_str,
+            "user_id": user_id,
+            "reason": reason,
+            "duration_min": minutes,
+            "order_id": order_id,
+            "amount_uah": 0,
+        }
+        STORE.add_appointment(date_key, rec)
+    except Exception as e:
+        SLOTS.release(date_key, time_str, minutes=minutes)
+        logger.error(f"finalize_booking: failed to store {date_key} {time_str}: {e}")
+        return False
 
-            if event_id:
-                rec["gcal_event_id"] = event_id
-                logger.info(f"Google Calendar: подію створено ({event_id})")
-            else:
-                logger.warning(
-                    "Google Calendar: не вдалося створити подію (нема відповідної функції)."
-                )
-        except Exception as e:
-            logger.error(f"Google Calendar: не вдалося створити подію: {e}")
+    if CAL_BACKEND is not None and CAL_BACKEND.ready:
+        CALENDAR_OUTBOX.submit(
+            order_job(date_key, rec, USERS.get(user_id, {}), TIMEZONE)
+        )
 
     logger.info(
-        f"BOOKED: {date_key} {time_str} by {user_id} — {reason} (order_id={order_id})"
+        f"BOOKED: {date_key} {time_str} ({minutes} min) by {user_id} — {reason} "
+        f"(order_id={order_id})"
     )
     return True
 
 
+async def _gcal_diagnostics() -> None:
+    visible, has_access = await asyncio.gather(
+        asyncio.to_thread(gcal_list_visible, gcal_service),
+        asyncio.to_thread(gcal_can_access, gcal_service, GOOGLE_CALENDAR_ID),
+        return_exceptions=True,
+    )
+    if isinstance(visible, Exception):
+        logger.warning(f"Google Calendar: не вдалося отримати calendarList — {visible}")
+    elif visible:
+        logger.info("Calendars visible to service account:")
+        for c in visible:
+            logger.info(f"  • {c['summary']} ({c['id']})")
+    else:
+        logger.warning("Service account currently sees 0 calendars in calendarList.")
+
+    if has_access is not True:
+        logger.error(
+            "Service account НЕ має доступу до GOOGLE_CALENDAR_ID → вставка подій дасть 404."
+        )
+        logger.error(
+            "Поділи календар «СТО» з цим email сервісного акаунта (Make changes to events)."
+        )
+
+
+_first_update_seen = False
+
+
+async def _first_update_mw(handler, event, data):
+    global _first_update_seen
+    if not _first_update_seen:
+        _first_update_seen = True
+        logger.info(
+            f"[startup] first update handled "
+            f"{time.perf_counter() - STARTED_AT:.2f}s after launch"
+        )
+    return await handler(event, data)
+
+
 async def main():
-    global gcal_service, gcal_enabled
+    global gcal_service, gcal_enabled, CAL_BACKEND
 
     dp = Dispatcher(storage=MemoryStorage())
+    dp.update.outer_middleware(_first_update_mw)
     dp.include_router(r)
     dp.include_router(r_admin)
     dp.include_router(r_pay)
 
     bot = Bot(BOT_TOKEN)
 
-    if GOOGLE_SERVICE_ACCOUNT_FILE and GOOGLE_CALENDAR_ID:
+    await STORE.start()
+    await asyncio.to_thread(WORK_CAL.start, now_local(TIMEZONE).date())
+    SLOTS.start()
+    await start_http_client()
+    if VIN_ENRICH_ASYNC:
+        VIN_ENRICHER.start()
+
+    gcal_diag = None
+    if (
+        isinstance(CAL_BACKEND, GoogleCalendarBackend)
+        and GOOGLE_SERVICE_ACCOUNT_FILE
+        and GOOGLE_CALENDAR_ID
+    ):
         try:
+            t0 = time.perf_counter()
+            creds = await asyncio.to_thread(
+                gcal_load_credentials, GOOGLE_SERVICE_ACCOUNT_FILE
+            )
             gcal_service = await asyncio.to_thread(
-                get_calendar_service, GOOGLE_SERVICE_ACCOUNT_FILE
+                get_calendar_service, credentials=creds
             )
             gcal_enabled = True
-            logger.info("Google Calendar: клієнт ініціалізовано.")
-
-            sa_email = await asyncio.to_thread(
-                get_service_account_email, GOOGLE_SERVICE_ACCOUNT_FILE
+            CAL_BACKEND.service = gcal_service
+            logger.info(
+                f"Google Calendar: клієнт ініціалізовано за "
+                f"{time.perf_counter() - t0:.2f} с."
             )
-            logger.info(f"Service Account email: {sa_email}")
-
-            visible = await asyncio.to_thread(gcal_list_visible, gcal_service)
-            if visible:
-                logger.info("Calendars visible to service account:")
-                for c in visible:
-                    logger.info(f"  • {c['summary']} ({c['id']})")
-            else:
-                logger.warning(
-                    "Service account currently sees 0 calendars in calendarList."
-                )
-
-            has_access = await asyncio.to_thread(
-                gcal_can_access, gcal_service, GOOGLE_CALENDAR_ID
-            )
-            if not has_access:
-                logger.error(
-                    "Service account НЕ має доступу до GOOGLE_CALENDAR_ID → вставка подій дасть 404."
-                )
-                logger.error(
-                    "Поділи календар «СТО» з цим email сервісного акаунта (Make changes to events)."
-                )
+            logger.info(f"Service Account email: {creds.service_account_email}")
+            gcal_diag = asyncio.create_task(_gcal_diagnostics())
         except Exception as e:
             gcal_service = None
             gcal_enabled = False
             logger.error(f"Google Calendar: помилка ініціалізації — {e}")
 
+    elif CAL_BACKEND is not None:
+        try:
+            await asyncio.to_thread(CAL_BACKEND.open)
+        except Exception as e:
+            logger.error(f"Календар ({CAL_BACKEND.name}): помилка ініціалізації — {e}")
+            CAL_BACKEND = None
+
+    if CAL_BACKEND is not None and CAL_BACKEND.ready:
+        CALENDAR_OUTBOX.start()
+        logger.info(f"Calendar backend: {CAL_BACKEND.name}")
+    if gcal_enabled and GCAL_SYNC_INTERVAL_SEC > 0:
+        GCAL_SYNC.start()
+
+    # Прогріваємо місячний кеш вільних днів до першого запиту.
+    today = now_local(TIMEZONE)
+    for i in range(BOOKING_MONTHS_AHEAD + 1):
+        AVAILABILITY.month(*_add_months(today.year, today.month, i))
+
     init_admin_context(
         users=USERS,
         appointments=APPOINTMENTS,
-        booked=BOOKED,
+        store=STORE,
+        work_calendar=WORK_CAL,
         timezone=TIMEZONE,
         admin_ids=ADMIN_IDS,
         gcal_ok=gcal_enabled,
@@ -913,14 +1353,28 @@ async def main():
     init_pay_context(
         users=USERS,
         appointments=APPOINTMENTS,
+        orders=ORDERS,
         gcal_ok=gcal_enabled,
         gcal_svc=gcal_service,
         gcal_id=GOOGLE_CALENDAR_ID,
     )
     set_receipts_dir(RECEIPTS_DIR)
 
-    logger.info("Bot started.")
-    await dp.start_polling(bot)
+    logger.info(
+        f"Bot started. [startup] polling begins "
+        f"{time.perf_counter() - STARTED_AT:.2f}s after launch"
+    )
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if gcal_diag and not gcal_diag.done():
+            gcal_diag.cancel()
+        await GCAL_SYNC.stop()
+        await CALENDAR_OUTBOX.stop()
+        await VIN_ENRICHER.stop()
+        await close_http_client()
+        await SLOTS.stop()
+        await STORE.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,44 @@
+# markup_cache.py
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import metrics
+
+
+class MarkupCache:
+    """
+    LRU готових клавіатур, прив'язаних до дати.
+    До ключа додається версія дати: invalidate(date_key) її піднімає,
+    тож застарілі розмітки більше не знаходяться і витісняються з часом.
+    """
+
+    def __init__(self, name: str, *, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._items: OrderedDict[tuple, object] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        metrics.register(name, self.stats)
+
+    def invalidate(self, date_key: str | None = None) -> None:
+        if date_key is None:
+            self._items.clear()
+            return
+        self._versions[date_key] = self._versions.get(date_key, 0) + 1
+
+    def get(self, date_key: str, extra: Hashable, build: Callable[[], object]):
+        key = (date_key, self._versions.get(date_key, 0), extra)
+        markup = self._items.get(key)
+        if markup is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return markup
+        self.misses += 1
+        markup = build()
+        self._items[key] = markup
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return markup
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,30 @@
+# metrics.py
+from typing import Callable
+
+_SOURCES: dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, source: Callable[[], dict]) -> None:
+    _SOURCES[name] = source
+
+
+def snapshot() -> dict[str, dict]:
+    out: dict[str, dict] = {}
+    for name, source in _SOURCES.items():
+        try:
+            out[name] = source()
+        except Exception as e:
+            out[name] = {"error": str(e)}
+    return out
+
+
+def render_plain() -> str:
+    snap = snapshot()
+    if not snap:
+        return "📊 Метрик поки немає."
+    lines = ["📊 Метрики:", ""]
+    for name, values in sorted(snap.items()):
+        lines.append(f"• {name}")
+        for k, v in values.items():
+            lines.append(f"  {k}: {v}")
+    return "\n".join(lines)
@@ -14,6 +14,7 @@ PAY_CALLBACK_PREFIX = "pay"
 
 _USERS = {}
 _APPOINTMENTS = {}
+_ORDERS = {}
 _RECEIPTS_DIR = "./receipts" 
 
 
@@ -24,10 +25,11 @@ def set_receipts_dir(path: str):
     logger.info(f"[payments] receipts dir = {os.path.abspath(_RECEIPTS_DIR)}")
 
 
-def init_pay_context(*, users, appointments, gcal_ok, gcal_svc, gcal_id):
-    global _USERS, _APPOINTMENTS
+def init_pay_context(*, users, appointments, orders, gcal_ok, gcal_svc, gcal_id):
+    global _USERS, _APPOINTMENTS, _ORDERS
     _USERS = users
     _APPOINTMENTS = appointments
+    _ORDERS = orders
     logger.info("[payments] context inited (calendar ignored)")
 
 
@@ -81,26 +83,16 @@ async def simulate_payment(cq: CallbackQuery):
         await cq.answer("Некоректні дані платежу", show_alert=True)
         return
 
-    amount = 0
-    customer_name = ""
-    phone = ""
-    found_rec = None
-
-    for _, items in _APPOINTMENTS.items():
-        for rec in items:
-            if str(rec.get("order_id")) == order_id:
-                found_rec = rec
-                amount = int(rec.get("amount_uah") or 0)
-                u = _USERS.get(int(rec.get("user_id")), {})
-                customer_name = u.get("full_name", "")
-                phone = u.get("phone", "")
-                break
-        if found_rec:
-            break
-
+    found_rec = _ORDERS.get(order_id)
     if not found_rec:
         await cq.answer("Замовлення не знайдено.", show_alert=True)
         return
+
+    amount = int(found_rec.get("amount_uah") or 0)
+    u = _USERS.get(int(found_rec.get("user_id")), {})
+    customer_name = u.get("full_name", "")
+    phone = u.get("phone", "")
+
     if amount <= 0:
         await cq.answer("Сума не встановлена адміністратором.", show_alert=True)
         return
@@ -4,10 +4,26 @@ import re
 import aiohttp
 from loguru import logger
 
+from http_client import http_session
+from lookup_cache import TTLCache, PersistentCache, SingleFlight, MISSING
+from resilience import (
+    CircuitBreaker,
+    TransientHTTPError,
+    UpstreamUnavailable,
+    bucket_from_env,
+    call_upstream,
+)
+
 BAZAGAI_BASE = "https://baza-gai.com.ua/nomer/{plate}"
 
 _PLATE_RE = re.compile(r"^[A-ZА-ЯІЇЄ]{2}\d{4}[A-ZА-ЯІЇЄ]{2}$", re.IGNORECASE)
 
+PLATE_CACHE = TTLCache("plate")
+PLATE_DISK = PersistentCache("plate")
+PLATE_FLIGHTS = SingleFlight("plate")
+BAZAGAI_BREAKER = CircuitBreaker("bazagai")
+BAZAGAI_LIMITER = bucket_from_env("bazagai", "BAZAGAI")
+
 
 def normalize_plate(s: str) -> str:
     s = (s or "").upper()
@@ -25,6 +41,7 @@ async def fetch_plate_info(
     *,
     mock: bool | None = None,       
     timeout_sec: int | None = None,
+    budget_sec: float | None = None,
 ) -> dict | None:
     plate = normalize_plate(plate)
     if not plate_format_ok(plate):
@@ -35,26 +52,67 @@ async def fetch_plate_info(
         logger.warning("[BazaGAI] API key is missing, request skipped")
         return None
 
+    cached = PLATE_CACHE.get(plate)
+    if cached is not MISSING:
+        return cached
+
+    stored = await PLATE_DISK.get(plate)
+    if stored is not None:
+        PLATE_CACHE.put(plate, stored)
+        return stored
+
     timeout_sec = timeout_sec or int(os.getenv("BAZAGAI_TIMEOUT", "10"))
+    budget_sec = budget_sec or timeout_sec
 
     url = BAZAGAI_BASE.format(plate=plate)
     headers = {"Accept": "application/json", "X-Api-Key": api_key}
-    timeout = aiohttp.ClientTimeout(total=timeout_sec)
 
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        async with session.get(url, headers=headers) as resp:
+    try:
+        return await PLATE_FLIGHTS.do(
+            plate,
+            lambda: call_upstream(
+                BAZAGAI_BREAKER,
+                lambda t: _request_plate(plate, url, headers, t),
+                timeout_sec=timeout_sec,
+                budget_sec=budget_sec,
+                limiter=BAZAGAI_LIMITER,
+            ),
+        )
+    except UpstreamUnavailable as e:
+        logger.warning(f"[BazaGAI] {e} (plate {plate})")
+        return None
+
+
+async def _request_plate(
+    plate: str, url: str, headers: dict, timeout_sec: float
+) -> dict | None:
+    timeout = aiohttp.ClientTimeout(total=timeout_sec)
+    async with http_session() as session:
+        async with session.get(url, headers=headers, timeout=timeout) as resp:
+            if resp.status == 429 or resp.status >= 500:
+                raise TransientHTTPError(resp.status)
             if resp.status != 200:
                 logger.warning(f"[BazaGAI] HTTP {resp.status} for plate {plate}")
+                if resp.status == 404:
+                    PLATE_CACHE.put(plate, None)
+                return None
+
+            try:
+                data = await resp.json()
+            except (aiohttp.ContentTypeError, ValueError):
+                data = None
+            if not isinstance(data, dict):
+                logger.warning(f"[BazaGAI] invalid payload for plate {plate}")
+                PLATE_CACHE.put(plate, None)
                 return None
 
-            data = await resp.json()
             vendor = data.get("vendor") or data.get("make")
             model = data.get("model")
             year = data.get("model_year") or data.get("year")
             vin = data.get("vin")
             is_stolen = bool(data.get("is_stolen"))
 
-            return {
+            info = {
                 "plate": plate,
                 "vendor": vendor,
                 "model": model,
@@ -63,3 +121,6 @@ async def fetch_plate_info(
                 "is_stolen": is_stolen,
                 "raw": data,
             }
+            PLATE_CACHE.put(plate, info)
+            await PLATE_DISK.put(plate, info)
+            return info
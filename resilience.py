@@ -0,0 +1,265 @@
+# resilience.py
+import asyncio
+import os
+import random
+import time
+from datetime import date
+from typing import Any, Awaitable, Callable
+
+import aiohttp
+from loguru import logger
+
+import metrics
+
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+UPSTREAM_BACKOFF_SEC = float(os.getenv("UPSTREAM_BACKOFF_SEC", "0.2"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SEC = float(os.getenv("BREAKER_RESET_SEC", "30"))
+RATE_LIMIT_MAX_WAIT_SEC = float(os.getenv("RATE_LIMIT_MAX_WAIT_SEC", "2"))
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class RateLimitExceeded(UpstreamUnavailable):
+    pass
+
+
+class TransientHTTPError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+_TRANSIENT = (aiohttp.ClientError, asyncio.TimeoutError, TransientHTTPError)
+
+
+class CircuitBreaker:
+    """
+    closed → (N помилок поспіль) → open → (reset_timeout) → half_open:
+    пропускаємо одну пробу; успіх закриває, помилка знову відкриває.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = BREAKER_FAILURES,
+        reset_timeout: float = BREAKER_RESET_SEC,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        metrics.register(f"breaker:{name}", self.stats)
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+            logger.info(f"[breaker:{self.name}] half-open, probing upstream")
+        if self._probe_in_flight:
+            self.rejected += 1
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def release(self) -> None:
+        self._probe_in_flight = False
+
+    def on_success(self) -> None:
+        if self.state != "closed":
+            logger.info(f"[breaker:{self.name}] closed")
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def on_failure(self) -> None:
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning(
+                    f"[breaker:{self.name}] open for {self.reset_timeout:.0f}s "
+                    f"after {self.failures} failure(s)"
+                )
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class TokenBucket:
+    """
+    Token bucket (rate токенів/с, місткість burst) + добова квота.
+    Очікувачі обслуговуються по черзі (FIFO) і не довше за max_wait.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate: float,
+        burst: int,
+        daily_quota: int = 0,
+        max_wait: float = RATE_LIMIT_MAX_WAIT_SEC,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.max_wait = max_wait
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._day = date.today()
+        self.used_today = 0
+        self.waiting = 0
+        self.rejected = 0
+        metrics.register(f"ratelimit:{name}", self.stats)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _check_quota(self) -> None:
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self.used_today = 0
+        if self.daily_quota and self.used_today >= self.daily_quota:
+            self.rejected += 1
+            raise RateLimitExceeded(f"{self.name}: daily quota exhausted")
+
+    async def acquire(self, max_wait: float | None = None) -> None:
+        if self.rate <= 0:
+            return
+        self._check_quota()
+        wait_limit = self.max_wait if max_wait is None else min(max_wait, self.max_wait)
+        deadline = time.monotonic() + wait_limit
+        self.waiting += 1
+        try:
+            try:
+                await asyncio.wait_for(self._lock.acquire(), wait_limit)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise RateLimitExceeded(f"{self.name}: queue wait exceeded") from None
+            try:
+                self._refill()
+                if self.tokens < 1:
+                    delay = (1 - self.tokens) / self.rate
+                    if time.monotonic() + delay > deadline:
+                        self.rejected += 1
+                        raise RateLimitExceeded(f"{self.name}: rate limit")
+                    await asyncio.sleep(delay)
+                    self._refill()
+                self._check_quota()
+                self.tokens -= 1
+                self.used_today += 1
+            finally:
+                self._lock.release()
+        finally:
+            self.waiting -= 1
+
+    def stats(self) -> dict:
+        out = {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "used_today": self.used_today,
+        }
+        if self.daily_quota:
+            out["daily_quota"] = self.daily_quota
+            out["quota_used_pct"] = round(100 * self.used_today / self.daily_quota, 1)
+        return out
+
+
+def bucket_from_env(name: str, prefix: str) -> TokenBucket:
+    return TokenBucket(
+        name,
+        rate=float(os.getenv(f"{prefix}_RPS", "5")),
+        burst=int(os.getenv(f"{prefix}_BURST", "10")),
+        daily_quota=int(os.getenv(f"{prefix}_DAILY_QUOTA", "0")),
+    )
+
+
+async def call_upstream(
+    breaker: CircuitBreaker,
+    fn: Callable[[float], Awaitable[Any]],
+    *,
+    timeout_sec: float,
+    budget_sec: float,
+    limiter: TokenBucket | None = None,
+    retries: int = UPSTREAM_RETRIES,
+    backoff_sec: float = UPSTREAM_BACKOFF_SEC,
+) -> Any:
+    """
+    fn отримує таймаут спроби (не більший за залишок бюджету).
+    Повтори — лише на мережевих помилках / таймаутах / 429 / 5xx,
+    з «full jitter» паузою. Якщо бюджет вичерпано — UpstreamUnavailable.
+    """
+    deadline = time.monotonic() + budget_sec
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise UpstreamUnavailable(f"{breaker.name}: latency budget exhausted")
+        if not breaker.allow():
+            raise CircuitOpenError(f"{breaker.name}: circuit open")
+        if limiter is not None:
+            try:
+                await limiter.acquire(max_wait=remaining)
+            except BaseException:
+                breaker.release()
+                raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                breaker.release()
+                raise UpstreamUnavailable(f"{breaker.name}: latency budget exhausted")
+        try:
+            result = await fn(min(timeout_sec, remaining))
+        except _TRANSIENT as e:
+            breaker.on_failure()
+            attempt += 1
+            if attempt > retries:
+                raise UpstreamUnavailable(f"{breaker.name}: {e!r}") from e
+            delay = random.uniform(0, backoff_sec * (2 ** attempt))
+            if time.monotonic() + delay >= deadline:
+                raise UpstreamUnavailable(f"{breaker.name}: {e!r}") from e
+            logger.info(
+                f"[{breaker.name}] retry {attempt}/{retries} in {delay:.2f}s after {e!r}"
+            )
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.on_failure()
+            raise
+        else:
+            breaker.on_success()
+            return result
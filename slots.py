@@ -0,0 +1,287 @@
+# slots.py
+import asyncio
+import heapq
+import time
+from typing import Callable
+
+from loguru import logger
+
+from capacity import IntervalCounter
+
+UNIT_MIN = 30
+DEFAULT_DURATION_MIN = 60
+
+
+class SlotIndex:
+    """
+    Атомарне бронювання з урахуванням тривалості послуг і кількості постів (bays).
+    На кожну дату — дерево відрізків зайнятості робочого дня по UNIT_MIN хвилин:
+    чи влазить візит, вирішує максимум на проміжку за O(log n).
+    Тимчасові утримання (holds) лежать у тому ж дереві; знімає їх спільний sweeper.
+    blocked — години, зайняті сторонніми подіями календаря (date → time → к-сть).
+    hours_mask(date_key) — бітова маска відкритих годин дня (робочий календар).
+    """
+
+    def __init__(
+        self,
+        appointments: dict[str, list[dict]],
+        *,
+        blocked: dict[str, dict[str, int]] | None = None,
+        hours_mask: Callable[[str], int] | None = None,
+        open_hour: int = 9,
+        close_hour: int = 20,
+        bays: int = 1,
+        hold_ttl_sec: float = 300.0,
+    ):
+        self.appointments = appointments
+        self.blocked = blocked if blocked is not None else {}
+        self.hours_mask = hours_mask
+        self.open_min = open_hour * 60
+        self.start_hours = list(range(open_hour, close_hour))
+        self.units = (close_hour - open_hour) * 60 // UNIT_MIN
+        self.bays = bays
+        self.hold_ttl_sec = hold_ttl_sec
+        self._days: dict[str, IntervalCounter] = {}
+        # user_id → (date_key, time_str, lo, hi, expires)
+        self._holds: dict[int, tuple[str, str, int, int, float]] = {}
+        self._expiry: list[tuple[float, int]] = []
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._listeners: list[Callable[[str], None]] = []
+
+    def subscribe(self, fn: Callable[[str], None]) -> None:
+        """fn(date_key) викликається, коли на дату змінюється зайнятість."""
+        self._listeners.append(fn)
+
+    def _changed(self, date_key: str) -> None:
+        for fn in self._listeners:
+            fn(date_key)
+
+    def _span(self, time_str: str, minutes: int) -> tuple[int, int] | None:
+        h, m = map(int, time_str.split(":"))
+        lo = (h * 60 + m - self.open_min) // UNIT_MIN
+        hi = lo + -(-minutes // UNIT_MIN)
+        if lo < 0 or hi > self.units:
+            return None
+        return lo, hi
+
+    def _day(self, date_key: str) -> IntervalCounter:
+        tree = self._days.get(date_key)
+        if tree is None:
+            tree = IntervalCounter(self.units)
+            for rec in self.appointments.get(date_key, ()):
+                span = self._span(rec["time"], rec.get("duration_min", DEFAULT_DURATION_MIN))
+                if span:
+                    tree.add(*span, 1)
+            self._days[date_key] = tree
+        return tree
+
+    def _is_blocked(self, date_key: str, lo: int, hi: int, mask: int | None) -> bool:
+        first = (self.open_min + lo * UNIT_MIN) // 60
+        last = (self.open_min + hi * UNIT_MIN - 1) // 60
+        if mask is not None:
+            need = ((1 << (last + 1)) - 1) ^ ((1 << first) - 1)
+            if mask & need != need:
+                return True
+        hours = self.blocked.get(date_key)
+        if not hours:
+            return False
+        return any(f"{h:02d}:00" in hours for h in range(first, last + 1))
+
+    def _fits(
+        self,
+        date_key: str,
+        tree: IntervalCounter,
+        time_str: str,
+        minutes: int,
+        mask: int | None,
+    ) -> bool:
+        span = self._span(time_str, minutes)
+        if span is None or self._is_blocked(date_key, *span, mask):
+            return False
+        return tree.max(*span) < self.bays
+
+    def _mask(self, date_key: str) -> int | None:
+        return self.hours_mask(date_key) if self.hours_mask else None
+
+    def user_spans(self, date_key: str, user_id: int | None) -> tuple[tuple[int, int], ...]:
+        """Проміжки власних записів користувача на цю дату."""
+        if user_id is None:
+            return ()
+        out = []
+        for rec in self.appointments.get(date_key, ()):
+            if rec.get("user_id") != user_id:
+                continue
+            span = self._span(rec["time"], rec.get("duration_min", DEFAULT_DURATION_MIN))
+            if span:
+                out.append(span)
+        return tuple(out)
+
+    @staticmethod
+    def _overlaps(spans, lo: int, hi: int) -> bool:
+        return any(a < hi and lo < b for a, b in spans)
+
+    def overlaps_own(
+        self,
+        date_key: str,
+        time_str: str,
+        user_id: int | None,
+        *,
+        minutes: int = DEFAULT_DURATION_MIN,
+    ) -> bool:
+        """Чи перетинається візит з уже наявним записом цього ж користувача."""
+        span = self._span(time_str, minutes)
+        return span is not None and self._overlaps(self.user_spans(date_key, user_id), *span)
+
+    def _own_hold(self, date_key: str, user_id: int | None):
+        h = self._holds.get(user_id) if user_id is not None else None
+        return h if h is not None and h[0] == date_key else None
+
+    def hold_span(self, date_key: str, user_id: int | None) -> tuple[int, int] | None:
+        """Проміжок власного hold користувача на цю дату (або None)."""
+        own = self._own_hold(date_key, user_id)
+        return (own[2], own[3]) if own else None
+
+    def free_starts(
+        self,
+        date_key: str,
+        *,
+        minutes: int = DEFAULT_DURATION_MIN,
+        user_id: int | None = None,
+        after_hour: int | None = None,
+    ) -> list[str]:
+        """
+        Години початку, з яких візит на minutes хвилин влазить у вільний пост.
+        З user_id — без годин, що перетинаються з його власними записами.
+        """
+        mask = self._mask(date_key)
+        if mask == 0:
+            return []
+        tree = self._day(date_key)
+        own = self._own_hold(date_key, user_id)
+        mine = self.user_spans(date_key, user_id)
+        if own:
+            tree.add(own[2], own[3], -1)
+        try:
+            return [
+                t
+                for h in self.start_hours
+                if after_hour is None or h > after_hour
+                for t in (f"{h:02d}:00",)
+                if self._fits(date_key, tree, t, minutes, mask)
+                and not (mine and self._overlaps(mine, *self._span(t, minutes)))
+            ]
+        finally:
+            if own:
+                tree.add(own[2], own[3], 1)
+
+    def is_free(
+        self,
+        date_key: str,
+        time_str: str,
+        user_id: int | None = None,
+        *,
+        minutes: int = DEFAULT_DURATION_MIN,
+    ) -> bool:
+        if self.overlaps_own(date_key, time_str, user_id, minutes=minutes):
+            return False
+        tree = self._day(date_key)
+        own = self._own_hold(date_key, user_id)
+        if own:
+            tree.add(own[2], own[3], -1)
+        try:
+            return self._fits(date_key, tree, time_str, minutes, self._mask(date_key))
+        finally:
+            if own:
+                tree.add(own[2], own[3], 1)
+
+    def hold(
+        self,
+        date_key: str,
+        time_str: str,
+        user_id: int,
+        *,
+        minutes: int = DEFAULT_DURATION_MIN,
+    ) -> bool:
+        if not self.is_free(date_key, time_str, user_id, minutes=minutes):
+            return False
+        self.release_hold(user_id)
+        lo, hi = self._span(time_str, minutes)
+        self._day(date_key).add(lo, hi, 1)
+        expires = time.monotonic() + self.hold_ttl_sec
+        self._holds[user_id] = (date_key, time_str, lo, hi, expires)
+        heapq.heappush(self._expiry, (expires, user_id))
+        if self._wake is not None and self._expiry[0][0] == expires:
+            self._wake.set()
+        self._changed(date_key)
+        return True
+
+    def release_hold(self, user_id: int) -> None:
+        h = self._holds.pop(user_id, None)
+        if h is None:
+            return
+        self._day(h[0]).add(h[2], h[3], -1)
+        self._changed(h[0])
+
+    def reserve(
+        self,
+        date_key: str,
+        time_str: str,
+        user_id: int | None = None,
+        *,
+        minutes: int = DEFAULT_DURATION_MIN,
+    ) -> bool:
+        """
+        Перевірка й зайняття слота без жодного await між ними: в одному
+        event loop це атомарно, тож lock не потрібен. Викликати з потоків не можна.
+        """
+        if self.overlaps_own(date_key, time_str, user_id, minutes=minutes):
+            logger.info(f"[slots] {user_id} already booked around {date_key} {time_str}")
+            return False
+        if not self.is_free(date_key, time_str, user_id, minutes=minutes):
+            return False
+        lo, hi = self._span(time_str, minutes)
+        if user_id is not None:
+            self.release_hold(user_id)
+        self._day(date_key).add(lo, hi, 1)
+        self._changed(date_key)
+        return True
+
+    def release(
+        self, date_key: str, time_str: str, *, minutes: int = DEFAULT_DURATION_MIN
+    ) -> None:
+        span = self._span(time_str, minutes)
+        if span is None:
+            return
+        self._day(date_key).add(*span, -1)
+        self._changed(date_key)
+        logger.info(f"[slots] released {date_key} {time_str} ({minutes} min)")
+
+    def start(self) -> None:
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._sweeper())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sweeper(self) -> None:
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            while self._expiry and self._expiry[0][0] <= now:
+                expires, uid = heapq.heappop(self._expiry)
+                h = self._holds.get(uid)
+                if h is not None and h[4] == expires:
+                    self.release_hold(uid)
+                    logger.debug(f"[slots] hold expired {h[0]} {h[1]} ({uid})")
+            timeout = self._expiry[0][0] - now if self._expiry else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,313 @@
+# storage.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокування файлу недоступне
+    fcntl = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    order_id TEXT PRIMARY KEY,
+    date_key TEXT NOT NULL,
+    time     TEXT NOT NULL,
+    user_id  INTEGER NOT NULL,
+    data     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_appointments_date ON appointments(date_key);
+CREATE TABLE IF NOT EXISTS gcal_outbox (
+    order_id TEXT PRIMARY KEY,
+    data     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+class Store:
+    """
+    SQLite (WAL) сховище для USERS / APPOINTMENTS.
+    Читання — з пам'яті, запис — відкладений і пакетний (write-behind).
+    Дані читаються з файлу один раз в open(), тож писати в базу може лише
+    один процес: open() бере ексклюзивний lock на <path>.lock, і другий
+    екземпляр бота з тим самим DATA_DIR одразу падає з RuntimeError.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        flush_interval: float = 0.05,
+        max_batch: int = 500,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self.users: dict[int, dict] = {}
+        self.appointments: dict[str, list[dict]] = {}
+        self.orders: dict[str, dict] = {}
+        self.outbox: dict[str, dict] = {}
+        self.sync_state: dict[str, dict] = {}
+
+        self._conn: sqlite3.Connection | None = None
+        self._lock_file = None
+        self._db_lock = threading.Lock()
+        self._pending_users: dict[int, dict] = {}
+        self._pending_appts: dict[str, tuple[str, dict]] = {}
+        self._pending_outbox: dict[str, dict | None] = {}
+        self._pending_sync: dict[str, dict] = {}
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def open(self) -> None:
+        d = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(d, exist_ok=True)
+        self._acquire_file_lock()
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        self._load()
+        logger.info(
+            f"[store] {os.path.abspath(self.path)}: users={len(self.users)}, "
+            f"appointments={sum(len(v) for v in self.appointments.values())}"
+        )
+
+    def _acquire_file_lock(self) -> None:
+        if fcntl is None or self._lock_file is not None:
+            return
+        f = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            raise RuntimeError(
+                f"{os.path.abspath(self.path)} вже відкрито іншим процесом — "
+                "Store підтримує лише одного записувача"
+            ) from None
+        self._lock_file = f
+
+    def _release_file_lock(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _load(self) -> None:
+        self.users.clear()
+        self.appointments.clear()
+        self.orders.clear()
+        self.outbox.clear()
+        self.sync_state.clear()
+        for uid, data in self._conn.execute("SELECT user_id, data FROM users"):
+            self.users[int(uid)] = json.loads(data)
+        rows = self._conn.execute(
+            "SELECT date_key, time, data FROM appointments ORDER BY date_key, time"
+        )
+        for date_key, _, data in rows:
+            rec = json.loads(data)
+            self.appointments.setdefault(date_key, []).append(rec)
+            self.orders[str(rec["order_id"])] = rec
+        for order_id, data in self._conn.execute("SELECT order_id, data FROM gcal_outbox"):
+            self.outbox[order_id] = json.loads(data)
+        for name, data in self._conn.execute("SELECT name, data FROM sync_state"):
+            self.sync_state[name] = json.loads(data)
+
+    async def start(self) -> None:
+        if self._conn is None:
+            self.open()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._writer_loop())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+            self._conn = None
+        self._release_file_lock()
+        logger.info("[store] closed")
+
+    def save_user(self, user_id: int, data: dict) -> None:
+        self.users[user_id] = data
+        self._pending_users[user_id] = data
+        self._kick()
+
+    def add_appointment(self, date_key: str, rec: dict) -> None:
+        self.appointments.setdefault(date_key, []).append(rec)
+        self.save_appointment(date_key, rec)
+
+    def save_appointment(self, date_key: str, rec: dict) -> None:
+        order_id = str(rec["order_id"])
+        self.orders[order_id] = rec
+        self._pending_appts[order_id] = (date_key, rec)
+        self._kick()
+
+    def save_outbox(self, job: dict) -> None:
+        order_id = str(job["order_id"])
+        self.outbox[order_id] = job
+        self._pending_outbox[order_id] = job
+        self._kick()
+
+    def delete_outbox(self, order_id: str) -> None:
+        self.outbox.pop(order_id, None)
+        self._pending_outbox[order_id] = None
+        self._kick()
+
+    def save_sync_state(self, name: str, data: dict) -> None:
+        self.sync_state[name] = data
+        self._pending_sync[name] = data
+        self._kick()
+
+    def _has_pending(self) -> bool:
+        return bool(
+            self._pending_users
+            or self._pending_appts
+            or self._pending_outbox
+            or self._pending_sync
+        )
+
+    def _kick(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _writer_loop(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            pending = (
+                len(self._pending_users)
+                + len(self._pending_appts)
+                + len(self._pending_outbox)
+                + len(self._pending_sync)
+            )
+            if pending < self.max_batch:
+                await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"[store] flush failed: {e}")
+                await asyncio.sleep(1.0)
+                self._kick()
+
+    async def flush(self) -> None:
+        if not self._has_pending() or self._conn is None:
+            return
+        users, self._pending_users = self._pending_users, {}
+        appts, self._pending_appts = self._pending_appts, {}
+        outbox, self._pending_outbox = self._pending_outbox, {}
+        sync, self._pending_sync = self._pending_sync, {}
+
+        user_rows = [
+            (uid, json.dumps(data, ensure_ascii=False)) for uid, data in users.items()
+        ]
+        appt_rows = [
+            (
+                order_id,
+                date_key,
+                rec.get("time"),
+                int(rec.get("user_id")),
+                json.dumps(rec, ensure_ascii=False),
+            )
+            for order_id, (date_key, rec) in appts.items()
+        ]
+        outbox_rows = [
+            (order_id, json.dumps(job, ensure_ascii=False))
+            for order_id, job in outbox.items()
+            if job is not None
+        ]
+        outbox_deleted = [(order_id,) for order_id, job in outbox.items() if job is None]
+        sync_rows = [
+            (name, json.dumps(data, ensure_ascii=False)) for name, data in sync.items()
+        ]
+        try:
+            await asyncio.to_thread(
+                self._write_batch,
+                user_rows,
+                appt_rows,
+                outbox_rows,
+                outbox_deleted,
+                sync_rows,
+            )
+        except Exception:
+            for uid, data in users.items():
+                self._pending_users.setdefault(uid, data)
+            for order_id, item in appts.items():
+                self._pending_appts.setdefault(order_id, item)
+            for order_id, job in outbox.items():
+                self._pending_outbox.setdefault(order_id, job)
+            for name, data in sync.items():
+                self._pending_sync.setdefault(name, data)
+            raise
+
+    def _write_batch(
+        self,
+        user_rows: list,
+        appt_rows: list,
+        outbox_rows: list,
+        outbox_deleted: list,
+        sync_rows: list,
+    ) -> None:
+        with self._db_lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                if user_rows:
+                    cur.executemany(
+                        "INSERT INTO users(user_id, data) VALUES(?, ?) "
+                        "ON CONFLICT(user_id) DO UPDATE SET data=excluded.data",
+                        user_rows,
+                    )
+                if appt_rows:
+                    cur.executemany(
+                        "INSERT INTO appointments(order_id, date_key, time, user_id, data) "
+                        "VALUES(?, ?, ?, ?, ?) "
+                        "ON CONFLICT(order_id) DO UPDATE SET "
+                        "date_key=excluded.date_key, time=excluded.time, "
+                        "user_id=excluded.user_id, data=excluded.data",
+                        appt_rows,
+                    )
+                if outbox_rows:
+                    cur.executemany(
+                        "INSERT INTO gcal_outbox(order_id, data) VALUES(?, ?) "
+                        "ON CONFLICT(order_id) DO UPDATE SET data=excluded.data",
+                        outbox_rows,
+                    )
+                if outbox_deleted:
+                    cur.executemany(
+                        "DELETE FROM gcal_outbox WHERE order_id=?", outbox_deleted
+                    )
+                if sync_rows:
+                    cur.executemany(
+                        "INSERT INTO sync_state(name, data) VALUES(?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET data=excluded.data",
+                        sync_rows,
+                    )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        logger.debug(
+            f"[store] flushed users={len(user_rows)}, appointments={len(appt_rows)}"
+        )
@@ -0,0 +1,77 @@
+import asyncio
+import importlib
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def bot_main(tmp_path_factory):
+    mp = pytest.MonkeyPatch()
+    mp.setenv("BOT_TOKEN", "123:test")
+    mp.setenv("DATA_DIR", str(tmp_path_factory.mktemp("data")))
+    mp.setenv("CALENDAR_BACKEND", "memory")
+    mp.setenv("SERVICE_BAYS", "1")
+    yield importlib.import_module("main")
+    mp.undo()
+
+
+def _open_day() -> str:
+    d = date.today() + timedelta(days=30)
+    while d.weekday() >= 5:
+        d += timedelta(days=1)
+    return d.strftime("%d.%m.%Y")
+
+
+def test_concurrent_finalize_booking_has_one_winner(bot_main):
+    m = bot_main
+    date_key, time_str = _open_day(), "10:00"
+
+    async def run():
+        await m.STORE.start()
+        m.CALENDAR_OUTBOX.start()
+        try:
+            results = await asyncio.gather(
+                *[
+                    m.finalize_booking(uid, date_key, time_str, "діагностика", minutes=60)
+                    for uid in range(1, 3001)
+                ]
+            )
+            for _ in range(100):
+                if m.CALENDAR_OUTBOX.stats()["depth"] == 0:
+                    break
+                await asyncio.sleep(0.05)
+            return results
+        finally:
+            await m.CALENDAR_OUTBOX.stop()
+            await m.STORE.close()
+
+    results = asyncio.run(run())
+
+    assert results.count(True) == 1
+    assert len(m.APPOINTMENTS[date_key]) == 1
+    winner = m.APPOINTMENTS[date_key][0]
+    assert set(m.ORDERS) == {winner["order_id"]}
+
+    events = m.CAL_BACKEND.events
+    assert [e["order_id"] for e in events.values()] == [winner["order_id"]]
+    assert winner["gcal_event_id"] in events
+
+
+def test_finalize_booking_runs_without_yielding(bot_main):
+    """Атомарність тримається на відсутності await: корутина має завершитися за один крок."""
+    m = bot_main
+    date_key, time_str = _open_day(), "12:00"
+
+    async def run():
+        await m.STORE.start()
+        try:
+            coro = m.finalize_booking(1, date_key, time_str, "діагностика", minutes=60)
+            with pytest.raises(StopIteration) as done:
+                coro.send(None)
+            return done.value.value
+        finally:
+            await m.STORE.close()
+
+    assert asyncio.run(run()) is True
+    assert m.SLOTS.reserve(date_key, time_str, 2, minutes=60) is False
@@ -0,0 +1,62 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import plate_api
+from lookup_cache import PersistentCache, SingleFlight, TTLCache
+
+
+def test_concurrent_plate_lookups_hit_upstream_once(tmp_path, monkeypatch):
+    hits = 0
+
+    async def handler(request):
+        nonlocal hits
+        hits += 1
+        await asyncio.sleep(0.3)
+        return web.json_response({"vendor": "TOYOTA", "model": "CAMRY", "model_year": 2019})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/nomer/{plate}", handler)
+        async with TestServer(app) as server:
+            base = f"http://{server.host}:{server.port}/nomer/{{plate}}"
+            monkeypatch.setattr(plate_api, "BAZAGAI_BASE", base)
+            monkeypatch.setattr(plate_api, "PLATE_CACHE", TTLCache("plate-test"))
+            monkeypatch.setattr(
+                plate_api, "PLATE_DISK", PersistentCache("plate", path=str(tmp_path / "c.db"))
+            )
+            monkeypatch.setattr(plate_api, "PLATE_FLIGHTS", SingleFlight("plate-test"))
+            return await asyncio.gather(
+                *[plate_api.fetch_plate_info("AA1234BB", api_key="k") for _ in range(100)]
+            )
+
+    results = asyncio.run(run())
+    assert hits == 1
+    assert all(r and r["model"] == "CAMRY" for r in results)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    calls = 0
+
+    async def lookup():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        sf = SingleFlight("cancel-test")
+        leader = asyncio.create_task(sf.do("k", lookup))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(sf.do("k", lookup)) for _ in range(10)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        res = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        return res, sf
+
+    res, sf = asyncio.run(run())
+    assert res == ["ok"] * 10
+    assert calls == 2
+    assert sf.takeovers == 10
@@ -2,14 +2,20 @@
 import os
 import re
 from datetime import datetime
+from functools import cache
 from zoneinfo import ZoneInfo
 from typing import Optional, Set
 
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 
 
+@cache
+def get_tz(tz: str) -> ZoneInfo:
+    return ZoneInfo(tz)
+
+
 def now_local(tz: str) -> datetime:
-    return datetime.now(ZoneInfo(tz))
+    return datetime.now(get_tz(tz))
 
 
 def normalize_date(text: str, tz: str) -> Optional[str]:
@@ -45,9 +51,13 @@ def is_admin(user_id: int, admin_ids: Set[int]) -> bool:
     return user_id in admin_ids
 
 
+@cache
 def main_menu(is_registered: bool, is_admin_flag: bool = False) -> ReplyKeyboardMarkup:
     kb = (
-        [[KeyboardButton(text="Зробити запис")]]
+        [
+            [KeyboardButton(text="Зробити запис")],
+            [KeyboardButton(text="⚡ Найближчий вільний час")],
+        ]
         if is_registered
         else [[KeyboardButton(text="Зареєструватися")]]
     )
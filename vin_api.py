@@ -1,8 +1,22 @@
 import re
 import os
+import asyncio
+from typing import Iterable
+
 import aiohttp
 from loguru import logger
 
+from http_client import http_session
+from vin_decoder import decode_vin
+from lookup_cache import TTLCache, PersistentCache, SingleFlight, MISSING
+from resilience import (
+    CircuitBreaker,
+    TransientHTTPError,
+    UpstreamUnavailable,
+    bucket_from_env,
+    call_upstream,
+)
+
 _VIN_RE = re.compile(r"^[A-HJ-NPR-Z0-9]{17}$")
 
 _TRANSLIT = {
@@ -17,6 +31,12 @@ _WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
 
 AUTODEV_URL = "https://api.auto.dev/vin/{vin}"
 
+VIN_CACHE = TTLCache("vin")
+VIN_DISK = PersistentCache("vin")
+VIN_FLIGHTS = SingleFlight("vin")
+AUTODEV_BREAKER = CircuitBreaker("autodev")
+AUTODEV_LIMITER = bucket_from_env("autodev", "AUTO_DEV")
+
 
 def normalize_vin(s: str) -> str:
     s = (s or "").strip().upper()
@@ -92,42 +112,124 @@ async def fetch_vehicle_by_vin(
     api_key: str | None = None,
     *,
     timeout_sec: int | None = None,
+    budget_sec: float | None = None,
+    need_model: bool = False,
 ) -> dict | None:
+    """
+    За замовчуванням — лише локальне декодування (марка, рік) без мережі;
+    need_model=True додатково питає auto.dev про модель.
+    None, якщо VIN не розпізнано.
+    """
     vin = normalize_vin(vin)
     if not validate_vin(vin):
         return None
 
+    local = decode_vin(vin)
+    if not need_model:
+        return _with_local(vin, None, local)
+
+    remote = await _fetch_remote(vin, api_key, timeout_sec, budget_sec)
+    return _with_local(vin, remote, local)
+
+
+def _with_local(vin: str, remote: dict | None, local: dict) -> dict | None:
+    if remote is None:
+        if not local:
+            return None
+        return {
+            "vin": vin,
+            "make": local.get("make"),
+            "model": None,
+            "year": local.get("year"),
+            "trim": None,
+        }
+    if (remote.get("make") and remote.get("year")) or not local:
+        return remote
+    return {
+        **remote,
+        "make": remote.get("make") or local.get("make"),
+        "year": remote.get("year") or local.get("year"),
+    }
+
+
+async def _fetch_remote(
+    vin: str,
+    api_key: str | None,
+    timeout_sec: int | None,
+    budget_sec: float | None,
+) -> dict | None:
     api_key = api_key or os.getenv("AUTO_DEV_API_KEY", "")
     if not api_key:
         logger.error("[auto.dev] AUTO_DEV_API_KEY не заданий у .env")
         return None
 
+    cached = VIN_CACHE.get(vin)
+    if cached is not MISSING:
+        return cached
+
+    stored = await VIN_DISK.get(vin)
+    if stored is not None:
+        VIN_CACHE.put(vin, stored)
+        return stored
+
     timeout_sec = timeout_sec or int(os.getenv("AUTO_DEV_TIMEOUT", "10"))
+    budget_sec = budget_sec or timeout_sec
 
     url = AUTODEV_URL.format(vin=vin)
     headers = {
         "accept": "application/json",
         "x-api-key": api_key,
     }
-    timeout = aiohttp.ClientTimeout(total=timeout_sec)
 
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        async with session.get(url, headers=headers) as resp:
+    try:
+        return await VIN_FLIGHTS.do(
+            vin,
+            lambda: call_upstream(
+                AUTODEV_BREAKER,
+                lambda t: _request_vin(vin, url, headers, t),
+                timeout_sec=timeout_sec,
+                budget_sec=budget_sec,
+                limiter=AUTODEV_LIMITER,
+            ),
+        )
+    except UpstreamUnavailable as e:
+        logger.warning(f"[auto.dev] {e} (VIN {vin})")
+        return None
+
+
+async def _request_vin(
+    vin: str, url: str, headers: dict, timeout_sec: float
+) -> dict | None:
+    timeout = aiohttp.ClientTimeout(total=timeout_sec)
+    async with http_session() as session:
+        async with session.get(url, headers=headers, timeout=timeout) as resp:
+            if resp.status == 429 or resp.status >= 500:
+                raise TransientHTTPError(resp.status)
             if resp.status != 200:
                 text = await resp.text()
                 logger.warning(
                     f"[auto.dev] HTTP {resp.status} for VIN {vin} → {text[:300]}"
                 )
+                if resp.status in (400, 404):
+                    VIN_CACHE.put(vin, None)
+                return None
+
+            try:
+                data = await resp.json()
+            except (aiohttp.ContentTypeError, ValueError):
+                data = None
+            if not isinstance(data, dict):
+                logger.warning(f"[auto.dev] invalid payload for VIN {vin}")
+                VIN_CACHE.put(vin, None)
                 return None
 
-            data = await resp.json()
             vehicle = _extract_vehicle(data)
 
             make = vehicle.get("make")
             model = vehicle.get("model")
             year = vehicle.get("year")
 
-            return {
+            info = {
                 "vin": vin,
                 "make": make,
                 "model": model,
@@ -135,3 +237,42 @@ async def fetch_vehicle_by_vin(
                 "trim": None,
                 "raw": data,
             }
+            VIN_CACHE.put(vin, info)
+            await VIN_DISK.put(vin, info)
+            return info
+
+
+async def warm_up_vin_cache(
+    vins: Iterable[str],
+    api_key: str | None = None,
+    *,
+    concurrency: int = 4,
+) -> tuple[int, int]:
+    it = iter(vins)
+    found = 0
+    total = 0
+
+    async def worker():
+        nonlocal found, total
+        for raw in it:
+            vin = normalize_vin(raw)
+            if not validate_vin(vin):
+                continue
+            total += 1
+            if await fetch_vehicle_by_vin(vin, api_key, need_model=True):
+                found += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    logger.info(f"[auto.dev] warm-up done: {found}/{total} VIN(s) cached")
+    return found, total
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if len(sys.argv) != 2:
+        raise SystemExit("usage: python vin_api.py <file with one VIN per line>")
+    with open(sys.argv[1], encoding="utf-8") as f:
+        asyncio.run(warm_up_vin_cache(line for line in f if line.strip()))
@@ -0,0 +1,222 @@
+# vin_decoder.py
+from datetime import date
+
+# WMI (позиції 1–3) → виробник. Неповна таблиця найпоширеніших кодів.
+_WMI_RAW = """
+19X Honda
+1C3 Chrysler
+1C4 Jeep
+1C6 Ram
+1FA Ford
+1FD Ford
+1FM Ford
+1FT Ford
+1G1 Chevrolet
+1G4 Buick
+1G6 Cadillac
+1GC Chevrolet
+1GT GMC
+1GY Cadillac
+1HD Harley-Davidson
+1HG Honda
+1J4 Jeep
+1LN Lincoln
+1N4 Nissan
+1N6 Nissan
+1VW Volkswagen
+1YV Mazda
+2C3 Chrysler
+2FA Ford
+2G1 Chevrolet
+2HG Honda
+2HK Honda
+2T1 Toyota
+2T3 Toyota
+3FA Ford
+3GN Chevrolet
+3HG Honda
+3N1 Nissan
+3VW Volkswagen
+4JG Mercedes-Benz
+4S3 Subaru
+4S4 Subaru
+4T1 Toyota
+4T3 Toyota
+4T4 Toyota
+5FN Honda
+5J6 Honda
+5LM Lincoln
+5N1 Nissan
+5NP Hyundai
+5TD Toyota
+5TF Toyota
+5UX BMW
+5XY Kia
+5YJ Tesla
+7SA Tesla
+JA3 Mitsubishi
+JA4 Mitsubishi
+JF1 Subaru
+JF2 Subaru
+JH4 Acura
+JHG Honda
+JHL Honda
+JHM Honda
+JM1 Mazda
+JMZ Mazda
+JN1 Nissan
+JN8 Nissan
+JNK Infiniti
+JS1 Suzuki
+JS2 Suzuki
+JS3 Suzuki
+JT2 Toyota
+JT3 Toyota
+JTD Toyota
+JTE Toyota
+JTH Lexus
+JTJ Lexus
+JTK Toyota
+JTM Toyota
+JTN Toyota
+JYA Yamaha
+KL1 Chevrolet
+KLA Daewoo
+KMH Hyundai
+KNA Kia
+KND Kia
+KNM Renault Samsung
+KPT SsangYong
+LBV BMW
+LFV Volkswagen
+LGX BYD
+LRW Tesla
+LSV Volkswagen
+LVS Ford
+SAJ Jaguar
+SAL Land Rover
+SCC Lotus
+SCF Aston Martin
+SHH Honda
+SHS Honda
+SJN Nissan
+TMA Hyundai
+TMB Skoda
+TRU Audi
+TSM Suzuki
+U5Y Kia
+U6Y Kia
+UU1 Dacia
+VF1 Renault
+VF3 Peugeot
+VF7 Citroen
+VF8 Matra
+VNK Toyota
+VR3 Peugeot
+VSK Nissan
+VSS SEAT
+VWV Volkswagen
+W0L Opel
+W0V Opel
+W1K Mercedes-Benz
+W1N Mercedes-Benz
+WA1 Audi
+WAU Audi
+WBA BMW
+WBS BMW
+WBY BMW
+WDB Mercedes-Benz
+WDC Mercedes-Benz
+WDD Mercedes-Benz
+WDF Mercedes-Benz
+WMA MAN
+WME Smart
+WMW MINI
+WP0 Porsche
+WP1 Porsche
+WUA Audi
+WV1 Volkswagen
+WV2 Volkswagen
+WVG Volkswagen
+WVW Volkswagen
+XTA Lada
+XW8 Volkswagen
+Y6D ZAZ
+YS2 Scania
+YS3 Saab
+YV1 Volvo
+YV4 Volvo
+ZAM Maserati
+ZAR Alfa Romeo
+ZCF Iveco
+ZFA Fiat
+ZFF Ferrari
+ZHW Lamborghini
+ZLA Lancia
+"""
+
+# Якщо повного WMI немає — пробуємо за першими двома символами.
+_WMI2_RAW = """
+JT Toyota
+KM Hyundai
+KN Kia
+WD Mercedes-Benz
+WB BMW
+"""
+
+
+def _parse(raw: str) -> dict[str, str]:
+    out: dict[str, str] = {}
+    for line in raw.strip().splitlines():
+        code, name = line.split(" ", 1)
+        out[code] = name
+    return out
+
+
+WMI: dict[str, str] = _parse(_WMI_RAW)
+WMI2: dict[str, str] = _parse(_WMI2_RAW)
+
+# Позиція 10 → рік у циклі 1980–2009 (у циклі 2010–2039 — те саме + 30).
+_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+_YEAR_BY_CHAR: tuple[int, ...] = tuple(
+    1980 + _YEAR_CODES.index(chr(c)) if chr(c) in _YEAR_CODES else 0
+    for c in range(128)
+)
+
+
+def decode_make(vin: str) -> str | None:
+    return WMI.get(vin[:3]) or WMI2.get(vin[:2])
+
+
+def decode_year(vin: str, *, max_year: int | None = None) -> int | None:
+    c = ord(vin[9])
+    y = _YEAR_BY_CHAR[c] if c < 128 else 0
+    if not y:
+        return None
+    if max_year is None:
+        max_year = date.today().year + 1
+    if vin[0] in "12345":
+        # Північна Америка: літера на позиції 7 → цикл 2010–2039.
+        if vin[6].isalpha():
+            y += 30
+    elif y + 30 <= max_year:
+        # Для решти ринків позиція 7 нічого не каже — беремо новіший цикл.
+        y += 30
+    if y > max_year:
+        y -= 30
+    return y
+
+
+def decode_vin(vin: str, *, max_year: int | None = None) -> dict:
+    """
+    Локальне декодування вже нормалізованого, валідного VIN.
+    Повертає лише те, що вдалось визначити: {"make": ..., "year": ...}.
+    """
+    out = {}
+    make = decode_make(vin)
+    if make:
+        out["make"] = make
+    year = decode_year(vin, max_year=max_year)
+    if year:
+        out["year"] = year
+    return out
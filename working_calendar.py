@@ -0,0 +1,195 @@
+# working_calendar.py
+import time
+from array import array
+from datetime import date
+from typing import Callable
+
+import holidays
+from loguru import logger
+
+import metrics
+
+STORE_KEY = "work_calendar"
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def hours_mask(lo: int, hi: int) -> int:
+    """Бітова маска годин [lo, hi): біт h — година h відкрита."""
+    return ((1 << hi) - 1) ^ ((1 << lo) - 1) if 0 <= lo < hi <= 24 else 0
+
+
+def parse_hours(text: str) -> tuple[int, int]:
+    lo, hi = (int(x) for x in text.strip().split("-", 1))
+    if not 0 <= lo < hi <= 24:
+        raise ValueError(f"bad hours range: {text!r}")
+    return lo, hi
+
+
+def parse_weekly(spec: str, default: tuple[int, int]) -> list[tuple[int, int] | None]:
+    """
+    "sat=10-16,sun=off" → години роботи на кожен день тижня (None — вихідний).
+    Не згадані дні працюють за default; діапазони днів: "mon-fri=9-18".
+    """
+    week: list[tuple[int, int] | None] = [default] * 7
+    for item in (spec or "").split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        days, _, hours = item.partition("=")
+        first, _, last = days.strip().partition("-")
+        i = WEEKDAYS.index(first.strip())
+        j = WEEKDAYS.index(last.strip()) if last else i
+        value = None if hours.strip() == "off" else parse_hours(hours)
+        for wd in range(i, j + 1):
+            week[wd] = value
+    return week
+
+
+class WorkingCalendar:
+    """
+    Робочі години СТО по днях: тижневий графік, державні свята UA
+    і винятки від адміна (вихідний або скорочений день).
+    На старті для вікна з кількох років рахується масив бітових масок
+    годин (один int на день), тож «чи відкрита година» — це O(1).
+    Винятки зберігаються в Store (sync_state[STORE_KEY]).
+    """
+
+    def __init__(
+        self,
+        store,
+        *,
+        weekly: list[tuple[int, int] | None],
+        country: str = "UA",
+        years_back: int = 1,
+        years_ahead: int = 2,
+    ):
+        self.store = store
+        self.weekly = weekly
+        self.country = country
+        self.years_back = years_back
+        self.years_ahead = years_ahead
+        self.closures: dict[date, tuple[int, int] | None] = {}
+        self._holidays: holidays.HolidayBase | None = None
+        self._holiday_days: frozenset[date] = frozenset()
+        self._base = 0
+        self._end = 0
+        self._masks = array("I")
+        self._listeners: list[Callable[[str | None], None]] = []
+        self.build_ms = 0.0
+        metrics.register("work_calendar", self.stats)
+
+    @property
+    def open_hour(self) -> int:
+        return min(h[0] for h in self.weekly if h)
+
+    @property
+    def close_hour(self) -> int:
+        return max(h[1] for h in self.weekly if h)
+
+    def subscribe(self, fn: Callable[[str | None], None]) -> None:
+        """fn(date_key) викликається, коли змінюються години дня."""
+        self._listeners.append(fn)
+
+    def start(self, today: date) -> None:
+        state = self.store.sync_state.get(STORE_KEY) or {}
+        self.closures = {
+            date.fromisoformat(k): tuple(v) if v else None
+            for k, v in (state.get("closures") or {}).items()
+        }
+        self.build(today)
+
+    def build(self, today: date) -> None:
+        started = time.perf_counter()
+        first = date(today.year - self.years_back, 1, 1)
+        last = date(today.year + self.years_ahead, 12, 31)
+        self._holidays = holidays.country_holidays(
+            self.country, years=range(first.year, last.year + 1)
+        )
+        self._holiday_days = frozenset(self._holidays)
+        self._base, self._end = first.toordinal(), last.toordinal() + 1
+        self._masks = array(
+            "I", (self._compute(date.fromordinal(o)) for o in range(self._base, self._end))
+        )
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+        for fn in self._listeners:
+            fn(None)
+        logger.info(
+            f"[work_calendar] {first}..{last}: {len(self._masks)} day(s), "
+            f"{len(self.closures)} closure(s), {self.build_ms} ms"
+        )
+
+    def _compute(self, d: date) -> int:
+        if d in self.closures:
+            hours = self.closures[d]
+        elif self._is_holiday(d):
+            hours = None
+        else:
+            hours = self.weekly[d.weekday()]
+        return hours_mask(*hours) if hours else 0
+
+    def _is_holiday(self, d: date) -> bool:
+        if self._base <= d.toordinal() < self._end:
+            return d in self._holiday_days
+        return self._holidays is not None and d in self._holidays
+
+    def day_mask(self, d: date) -> int:
+        i = d.toordinal() - self._base
+        if 0 <= i < len(self._masks):
+            return self._masks[i]
+        return self._compute(d)
+
+    def key_mask(self, date_key: str) -> int:
+        dd, mm, yyyy = date_key.split(".")
+        return self.day_mask(date(int(yyyy), int(mm), int(dd)))
+
+    def is_closed(self, d: date) -> bool:
+        return self.day_mask(d) == 0
+
+    def is_open(self, d: date, hour: int) -> bool:
+        return bool(self.day_mask(d) >> hour & 1)
+
+    def open_hours(self, d: date) -> list[int]:
+        mask = self.day_mask(d)
+        return [h for h in range(24) if mask >> h & 1]
+
+    def set_closure(self, d: date, hours: tuple[int, int] | None) -> None:
+        """
+        Вихідний (hours=None) або скорочений день на дату d. Подовжити день
+        за межі open_hour..close_hour не можна — SlotIndex їх не покриває.
+        """
+        if hours and not self.open_hour <= hours[0] < hours[1] <= self.close_hour:
+            raise ValueError(f"hours {hours} outside {self.open_hour}-{self.close_hour}")
+        self.closures[d] = hours
+        self._changed(d)
+
+    def clear_closure(self, d: date) -> bool:
+        if d not in self.closures:
+            return False
+        del self.closures[d]
+        self._changed(d)
+        return True
+
+    def _changed(self, d: date) -> None:
+        i = d.toordinal() - self._base
+        if 0 <= i < len(self._masks):
+            self._masks[i] = self._compute(d)
+        self.store.save_sync_state(
+            STORE_KEY,
+            {
+                "closures": {
+                    k.isoformat(): list(v) if v else None
+                    for k, v in sorted(self.closures.items())
+                }
+            },
+        )
+        date_key = d.strftime("%d.%m.%Y")
+        for fn in self._listeners:
+            fn(date_key)
+        logger.info(f"[work_calendar] {date_key} → {self.closures.get(d, 'default')}")
+
+    def stats(self) -> dict:
+        return {
+            "days": len(self._masks),
+            "closures": len(self.closures),
+            "build_ms": self.build_ms,
+        }